@@ -1,13 +1,26 @@
+import asyncio
+import json
 import logging
 import os
 import secrets
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from celery.result import AsyncResult
 from celery import chain
-from analysis.store import store_pdf
-from analysis.types import AnalysisRequest, AnalysisResponse
-from analysis.services import run_full_analysis
+from analysis.cache import cache_stats
+from analysis.compaction import compact_text
+from analysis.metrics import render as render_metrics
+from analysis.events import stream_events
+from analysis.ranking import build_query, rank_texts
+from analysis.router import router_stats
+from analysis import singleflight
+from analysis.store import delete_pdf, load_extracted_texts
+from analysis.types import AnalysisRequest, AnalysisResponse, RankRequest
+from analysis.uploads import UploadLimitMiddleware, ingest_pdf
+from analysis.services import run_full_analysis_async
+from analysis.setup import init_llm_clients
 from analysis.tasks import analyze_resume_task, extract_text_task, reporting_task
 from backend.celery_app import celery_app
 from utils.logging_config import configure_logging
@@ -15,9 +28,16 @@ from utils.logging_config import configure_logging
 configure_logging()
 logger = logging.getLogger("backend.api")
 
-app = FastAPI(title="AI Resume Analyzer API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_llm_clients(asynchronous=True)
+    yield
+
+app = FastAPI(title="AI Resume Analyzer API", lifespan=lifespan)
 frontend_origin = os.getenv("FRONTEND_URL", "http://localhost:8000")
 
+# added before CORS so 413s still carry CORS headers
+app.add_middleware(UploadLimitMiddleware, paths=("/analysis/async",))
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[frontend_origin],
@@ -30,9 +50,23 @@ app.add_middleware(
 def health():
     return {"status": "ok"}
 
+@app.get("/analysis/cache/stats")
+def analysis_cache_stats():
+    return cache_stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint; worker-side series are aggregated in Redis."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/analysis/providers")
+def analysis_provider_stats():
+    return router_stats()
+
 @app.post("/analysis", response_model=AnalysisResponse)
-def analyze(payload: AnalysisRequest):
+async def analyze(payload: AnalysisRequest):
     try:
+        document_text, compaction = compact_text(payload.document_text)
         logger.info(
             "analysis_request",
             extra={
@@ -42,16 +76,24 @@ def analyze(payload: AnalysisRequest):
                 "criteria": payload.criteria,
                 "jd_prompt": payload.jd_prompt,
                 "text_length": len(payload.document_text),
+                **compaction,
             },
         )
-        return run_full_analysis(
-            payload.document_text,
+        params = payload.model_dump(exclude={"document_text"})
+        run = lambda: run_full_analysis_async(
+            document_text,
             model=payload.ai_model,
             temperature=payload.temperature,
             threshold=payload.threshold,
             criteria=payload.criteria,
             jd_prompt=payload.jd_prompt,
+            fused=payload.fused,
         )
+        if singleflight.SINGLE_FLIGHT_ENABLED:
+            result = await singleflight.coalesce(singleflight.fingerprint(document_text, params), run)
+        else:
+            result = await run()
+        return {**result, "compaction": compaction}
     except Exception as exc:
         logger.exception("analysis_failed")
         raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -67,6 +109,8 @@ async def analyze_async(
     experience_level: int | None = Form(default=None),
     job_description: str | None = Form(default=None),
     jd_prompt: str | None = Form(default=None),
+    fused: bool | None = Form(default=None),
+    extract_only: bool = Form(default=False),
 ):
     filename = (file.filename or "").strip()
     # if ai_model and ai_model not in ALLOWED_MODELS:
@@ -75,29 +119,107 @@ async def analyze_async(
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
     
     file_id = secrets.token_hex(16)
-    # save the file with file_id
-    pdf_bytes = await file.read()
-    if not pdf_bytes:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-    store_pdf(file_id, pdf_bytes)
-    
-    task = chain(
-        extract_text_task.s(file_id, filename),
-        analyze_resume_task.s(
-            ai_model=ai_model,
-            temperature=temperature,
-            threshold=threshold,
-            criteria={
-                "company_name": company_name,
-                "role": role,
-                "experience_level": experience_level,
-                "job_description": job_description,
-            },
-            jd_prompt=jd_prompt,
-        ),
-        reporting_task.s(),
-    ).apply_async()
-    return {"task_id": task.id, "file_id": file_id, "filename": filename}
+    # streamed straight into the PDF blob; 400/413 leave nothing behind
+    content_digest = await ingest_pdf(file, file_id)
+
+    criteria = {
+        "company_name": company_name,
+        "role": role,
+        "experience_level": experience_level,
+        "job_description": job_description,
+    }
+    fp = None
+    if singleflight.SINGLE_FLIGHT_ENABLED:
+        fp = singleflight.fingerprint_digest(content_digest, {
+            "ai_model": ai_model,
+            "temperature": temperature,
+            "threshold": threshold,
+            "criteria": criteria,
+            "jd_prompt": jd_prompt,
+            "fused": fused,
+            "extract_only": extract_only,
+        })
+        pointer = await singleflight.join_or_lock(fp, is_alive=_chain_alive)
+        if pointer is not None:
+            await asyncio.to_thread(delete_pdf, file_id)
+            return {**pointer, "coalesced": True}
+
+    def enqueue():
+        if extract_only:
+            # Batch ranking flow: extract now, analyze later via /analysis/rank.
+            return extract_text_task.apply_async(args=(file_id, filename))
+        return chain(
+            extract_text_task.s(file_id, filename),
+            analyze_resume_task.s(
+                ai_model=ai_model,
+                temperature=temperature,
+                threshold=threshold,
+                criteria=criteria,
+                jd_prompt=jd_prompt,
+                fused=fused,
+            ),
+            reporting_task.s(),
+        ).apply_async()
+
+    # Broker and Redis round-trips stay off the event loop.
+    try:
+        task = await asyncio.to_thread(enqueue)
+    except Exception:
+        await asyncio.to_thread(delete_pdf, file_id)
+        if fp is not None:
+            await asyncio.to_thread(singleflight.release, fp)
+        raise
+
+    response = {"task_id": task.id, "file_id": file_id, "filename": filename}
+    if fp is not None:
+        await asyncio.to_thread(singleflight.publish, fp, response)
+    return response
+
+
+def _chain_alive(task_id: str) -> bool:
+    """False once any task in the chain ending at ``task_id`` has failed."""
+    current = AsyncResult(task_id, app=celery_app)
+    while current is not None:
+        if current.state in ("FAILURE", "REVOKED"):
+            return False
+        current = getattr(current, "parent", None)
+    return True
+
+@app.post("/analysis/rank")
+def rank_resumes(payload: RankRequest):
+    """Rank already-extracted resumes against one JD, optionally analyzing the shortlist."""
+    file_ids = list(dict.fromkeys(payload.file_ids))
+    texts = load_extracted_texts(file_ids)
+    query = build_query(payload.jd_prompt, payload.criteria)
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Provide jd_prompt or criteria.job_description to rank against.")
+
+    shortlist = rank_texts(texts, query, top_k=payload.top_k)
+    logger.info(
+        "rank_request",
+        extra={"requested": len(file_ids), "ranked": len(texts), "top_k": payload.top_k},
+    )
+
+    if payload.enqueue:
+        for item in shortlist:
+            task = chain(
+                analyze_resume_task.s(
+                    {"file_id": item["file_id"], "file_name": None},
+                    ai_model=payload.ai_model,
+                    temperature=payload.temperature,
+                    threshold=payload.threshold,
+                    criteria=payload.criteria,
+                    jd_prompt=payload.jd_prompt,
+                    fused=payload.fused,
+                ),
+                reporting_task.s(),
+            ).apply_async()
+            item["task_id"] = task.id
+
+    return {
+        "shortlist": shortlist,
+        "missing": [file_id for file_id in file_ids if file_id not in texts],
+    }
 
 @app.get("/analysis/status/{task_id}")
 def analysis_status(task_id: str):
@@ -157,3 +279,23 @@ def analysis_status(task_id: str):
         payload["error"] = str(active.result)
 
     return payload
+
+@app.get("/analysis/events/{file_id}")
+async def analysis_events(file_id: str):
+    """Server-sent events for one upload: each finished stage, then done/failed."""
+    async def event_source():
+        async for event in stream_events(file_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield (
+                f"id: {event['seq']}\n"
+                f"event: {event['event']}\n"
+                f"data: {json.dumps(event['data'], default=str)}\n\n"
+            )
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
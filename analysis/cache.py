@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+import redis
+
+from analysis.store import r
+
+logger = logging.getLogger("backend.analysis.cache")
+
+# Content-addressed cache for LLM stage outputs (Redis db 2, next to analysis.store).
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))  # 1 week
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+_PREFIX = "llmcache"
+_LRU_INDEX = f"{_PREFIX}:lru"  # zset: key -> last access time
+_STATS = f"{_PREFIX}:stats"     # hash: hits / misses / evictions
+
+
+def _normalize(text: str | None) -> str:
+    return " ".join((text or "").split())
+
+
+def cache_key(
+    stage: str,
+    *,
+    text: str,
+    model: str | None,
+    temperature: float | None,
+    jd_prompt: str | None = None,
+    version: int | str = 1,
+) -> str:
+    payload = json.dumps(
+        {
+            "text": _normalize(text),
+            "model": model,
+            "temperature": temperature,
+            "jd_prompt": _normalize(jd_prompt) or None,
+            "version": version,
+            "stage": stage,
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{_PREFIX}:{stage}:{digest}"
+
+
+def _store_key(stage: str, key: str, model: str | None, served_model, inputs: dict) -> str:
+    served = served_model() if served_model is not None else None
+    if not served or served == model:
+        return key
+    logger.info("llm_cache_served_by_other_model", extra={"stage": stage, "requested": model, "served": served})
+    return cache_key(stage, model=served, **inputs)
+
+
+def get_cached(key: str) -> Any:
+    try:
+        data = r.get(key)
+        pipe = r.pipeline(transaction=False)
+        if data is None:
+            pipe.hincrby(_STATS, "misses", 1)
+            pipe.zrem(_LRU_INDEX, key)
+        else:
+            pipe.hincrby(_STATS, "hits", 1)
+            pipe.zadd(_LRU_INDEX, {key: time.time()})
+        pipe.execute()
+    except redis.RedisError:
+        logger.warning("llm_cache_get_failed", exc_info=True)
+        return None
+    return json.loads(data) if data is not None else None
+
+
+def set_cached(key: str, value: Any, ttl: int = CACHE_TTL):
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.setex(key, ttl, json.dumps(value))
+        pipe.zadd(_LRU_INDEX, {key: time.time()})
+        pipe.execute()
+        _evict(ttl)
+    except redis.RedisError:
+        logger.warning("llm_cache_set_failed", exc_info=True)
+
+
+def _evict(ttl: int):
+    # Index entries older than the TTL point at keys Redis has already expired.
+    r.zremrangebyscore(_LRU_INDEX, 0, time.time() - ttl)
+    overflow = r.zcard(_LRU_INDEX) - CACHE_MAX_ENTRIES
+    if overflow <= 0:
+        return
+    stale = r.zrange(_LRU_INDEX, 0, overflow - 1)
+    if not stale:
+        return
+    pipe = r.pipeline(transaction=False)
+    pipe.delete(*stale)
+    pipe.zrem(_LRU_INDEX, *stale)
+    pipe.hincrby(_STATS, "evictions", len(stale))
+    pipe.execute()
+
+
+def cached_call(
+    stage: str,
+    compute: Callable[[], Any],
+    *,
+    text: str,
+    model: str | None,
+    temperature: float | None,
+    jd_prompt: str | None = None,
+    version: int | str = 1,
+    cacheable: Callable[[Any], bool] | None = None,
+    served_model: Callable[[], str | None] | None = None,
+) -> Any:
+    """Return the cached output for these inputs, or compute and store it.
+
+    ``served_model`` reports the model that actually answered; a hedged or
+    failed-over answer is stored under that model's key, never the
+    requested one.
+    """
+    if not CACHE_ENABLED:
+        return compute()
+
+    inputs = {"text": text, "temperature": temperature, "jd_prompt": jd_prompt, "version": version}
+    key = cache_key(stage, model=model, **inputs)
+    hit = get_cached(key)
+    if hit is not None:
+        logger.debug("llm_cache_hit", extra={"stage": stage})
+        return hit
+
+    value = compute()
+    if value is not None and (cacheable is None or cacheable(value)):
+        set_cached(_store_key(stage, key, model, served_model, inputs), value)
+    return value
+
+
+async def cached_call_async(
+    stage: str,
+    compute: Callable[[], Awaitable[Any]],
+    *,
+    text: str,
+    model: str | None,
+    temperature: float | None,
+    jd_prompt: str | None = None,
+    version: int | str = 1,
+    cacheable: Callable[[Any], bool] | None = None,
+    served_model: Callable[[], str | None] | None = None,
+) -> Any:
+    """Async twin of ``cached_call``; Redis I/O runs off the event loop."""
+    if not CACHE_ENABLED:
+        return await compute()
+
+    inputs = {"text": text, "temperature": temperature, "jd_prompt": jd_prompt, "version": version}
+    key = cache_key(stage, model=model, **inputs)
+    hit = await asyncio.to_thread(get_cached, key)
+    if hit is not None:
+        logger.debug("llm_cache_hit", extra={"stage": stage})
+        return hit
+
+    value = await compute()
+    if value is not None and (cacheable is None or cacheable(value)):
+        await asyncio.to_thread(set_cached, _store_key(stage, key, model, served_model, inputs), value)
+    return value
+
+
+def cache_stats() -> dict:
+    stats = {k.decode() if isinstance(k, bytes) else k: int(v) for k, v in r.hgetall(_STATS).items()}
+    hits = stats.get("hits", 0)
+    misses = stats.get("misses", 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "evictions": stats.get("evictions", 0),
+        "entries": r.zcard(_LRU_INDEX),
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "max_entries": CACHE_MAX_ENTRIES,
+        "ttl": CACHE_TTL,
+    }
@@ -0,0 +1,113 @@
+import math
+import os
+import re
+import unicodedata
+from collections import Counter
+
+# Upper bound on resume tokens sent to any prompt (0 disables truncation).
+TOKEN_BUDGET = int(os.getenv("RESUME_TOKEN_BUDGET", "3000"))
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_HYPHEN_BREAK_RE = re.compile(r"([a-z])-\n([a-z])")
+_INLINE_SPACE_RE = re.compile(r"[ \t]+")
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$", re.IGNORECASE)
+_WORD_RE = re.compile(r"\S+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local estimate close to BPE counts for English prose."""
+    if not text:
+        return 0
+    pieces = len(_TOKEN_RE.findall(text))
+    return max(pieces, math.ceil(len(text) / 4))
+
+
+def _repeated_lines(pages: list[list[str]]) -> set[str]:
+    # Short lines present on most pages are running headers/footers.
+    if len(pages) < 2:
+        return set()
+    seen = Counter(line for page in pages for line in set(page) if len(line) < 80)
+    cutoff = max(2, math.ceil(len(pages) / 2))
+    return {line for line, count in seen.items() if count >= cutoff}
+
+
+def _cut(line: str, budget: int) -> str:
+    """Longest prefix of ``line`` ending on a word boundary that fits ``budget`` tokens."""
+    ends = [match.end() for match in _WORD_RE.finditer(line)]
+    lo, hi = 0, len(ends)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(line[:ends[mid - 1]]) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    if lo:
+        return line[:ends[lo - 1]]
+    # A single "word" over the budget (e.g. text with no spaces): cut by characters.
+    return line[:budget * 4]
+
+
+def _truncate(lines: list[str], budget: int) -> list[str]:
+    kept, used = [], 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1
+        if used + cost > budget:
+            # Cut the overflowing line instead of dropping it, so a resume that
+            # arrives as one long line doesn't compact to nothing.
+            remaining = budget - used - 1 if any(kept) else max(1, budget - used - 1)
+            if remaining > 0:
+                kept.append(_cut(line, remaining))
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+def compact_text(text: str, max_tokens: int | None = None) -> tuple[str, dict]:
+    """Normalize pdfminer output and fit it to the token budget.
+
+    Returns ``(compacted_text, stats)`` where stats holds the original and
+    compacted token estimates.
+    """
+    budget = TOKEN_BUDGET if max_tokens is None else max_tokens
+    original = text or ""
+
+    normalized = unicodedata.normalize("NFKC", original).replace("\r\n", "\n").replace("\r", "\n")
+    normalized = _HYPHEN_BREAK_RE.sub(r"\1\2", normalized)
+
+    pages = []
+    for raw_page in normalized.split("\x0c"):
+        lines = [_INLINE_SPACE_RE.sub(" ", line).strip() for line in raw_page.split("\n")]
+        pages.append(lines)
+    boilerplate = _repeated_lines(pages)
+
+    lines, seen = [], set()
+    for page in pages:
+        for line in page:
+            if not line:
+                if lines and lines[-1]:
+                    lines.append("")
+                continue
+            if _PAGE_NUMBER_RE.match(line):
+                continue
+            key = line.casefold()
+            # Keep short repeats (bullets like "Python"), drop repeated sentences
+            # and every running header/footer after its first occurrence.
+            if (len(line) > 40 or line in boilerplate) and key in seen:
+                continue
+            seen.add(key)
+            lines.append(line)
+
+    truncated = False
+    if budget > 0 and estimate_tokens("\n".join(lines)) > budget:
+        lines = _truncate(lines, budget)
+        truncated = True
+
+    compacted = "\n".join(lines).strip()
+    stats = {
+        "original_tokens": estimate_tokens(original),
+        "compacted_tokens": estimate_tokens(compacted),
+        "token_budget": budget,
+        "truncated": truncated,
+    }
+    return compacted, stats
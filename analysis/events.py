@@ -0,0 +1,84 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator
+
+import redis
+import redis.asyncio as aioredis
+
+from analysis.store import DEFAULT_TTL, REDIS_URL, r
+
+logger = logging.getLogger("backend.analysis.events")
+
+# Per-file progress events: every event is appended to a replay log and
+# published on a channel, so late subscribers still see what already happened.
+TERMINAL_EVENTS = {"done", "failed"}
+EVENTS_KEEPALIVE = float(os.getenv("ANALYSIS_EVENTS_KEEPALIVE", "15"))
+EVENTS_MAX_SECONDS = float(os.getenv("ANALYSIS_EVENTS_MAX_SECONDS", "900"))
+
+_async_redis = None
+
+
+def _channel(file_id: str) -> str:
+    return f"resume:{file_id}:events"
+
+
+def publish_event(file_id: str, event: str, data=None, ttl: int = DEFAULT_TTL):
+    channel = _channel(file_id)
+    try:
+        seq = r.incr(f"{channel}:seq")
+        message = json.dumps({"seq": seq, "event": event, "data": data}, default=str)
+        pipe = r.pipeline(transaction=False)
+        pipe.rpush(f"{channel}:log", message)
+        pipe.expire(f"{channel}:log", ttl)
+        pipe.expire(f"{channel}:seq", ttl)
+        pipe.publish(channel, message)
+        pipe.execute()
+    except redis.RedisError:
+        logger.warning("publish_event_failed", extra={"file_id": file_id, "event": event}, exc_info=True)
+
+
+def _get_async_redis():
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = aioredis.from_url(f"{REDIS_URL}/2")
+    return _async_redis
+
+
+async def stream_events(file_id: str) -> AsyncIterator[dict | None]:
+    """Yield past then live events for ``file_id``; ``None`` marks a keep-alive tick."""
+    client = _get_async_redis()
+    channel = _channel(file_id)
+    pubsub = client.pubsub()
+    # Subscribe before replaying so nothing published in between is lost.
+    await pubsub.subscribe(channel)
+    try:
+        last_seq = 0
+        for raw in await client.lrange(f"{channel}:log", 0, -1):
+            event = json.loads(raw)
+            last_seq = event["seq"]
+            yield event
+            if event["event"] in TERMINAL_EVENTS:
+                return
+
+        deadline = time.monotonic() + EVENTS_MAX_SECONDS
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=EVENTS_KEEPALIVE)
+            if message is None:
+                yield None
+                continue
+            event = json.loads(message["data"])
+            if event["seq"] <= last_seq:
+                continue
+            last_seq = event["seq"]
+            yield event
+            if event["event"] in TERMINAL_EVENTS:
+                return
+    finally:
+        try:
+            await pubsub.unsubscribe(channel)
+            await pubsub.aclose()
+        except (redis.RedisError, asyncio.CancelledError):
+            logger.debug("stream_events_close_failed", extra={"file_id": file_id})
@@ -0,0 +1,138 @@
+from typing import Optional
+import logging
+from analysis.utils import parse_json_block, retry_policy
+from analysis.skills import match_skills
+from analysis.ratelimit import RateLimited
+from groq import RateLimitError
+from .technical import as_technical_analysis_response
+from .semantic import as_semantic_analysis_response
+from .psychometric import as_psychometric_analysis_response
+from .types import FusedAnalysisInput, FusedAnalysisOutput
+logger = logging.getLogger("backend.analysis.fused")
+# Bump when the prompt below changes so cached outputs are not reused.
+PROMPT_VERSION = 2
+
+
+def fused_analysis(
+    input: FusedAnalysisInput,
+    task=None,
+) -> Optional[FusedAnalysisOutput]:
+    """One completion for all stages; returns None when the reply can't be validated."""
+    logger.debug("fused_analysis_request", extra={"input": input})
+
+    model_config = input.get("modelConfig", {})
+    client = model_config["client"]
+    model = model_config.get("model", "llama-3.1-8b-instant")
+    temperature = model_config.get("temperature", 0.2)
+    jd_prompt = input.get("jd_prompt")
+    text = input.get("text", "")
+    # Same taxonomy-based skillMatch as the staged technical analysis.
+    skill_match = match_skills(text)
+
+    logger.debug("fused_analysis_model_config", extra={"model": model, "temperature": temperature})
+
+    try:
+        completion = client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=_build_messages(text, jd_prompt, skill_match),
+        )
+    except (RateLimitError, RateLimited) as exc:
+        if task is not None:
+            return retry_policy(task, exc, "rate_limit")
+        raise
+
+    return _to_output(completion, skill_match)
+
+
+async def fused_analysis_async(
+    input: FusedAnalysisInput,
+) -> Optional[FusedAnalysisOutput]:
+    logger.debug("fused_analysis_async_request", extra={"input": input})
+
+    model_config = input.get("modelConfig", {})
+    client = model_config["client"]
+    text = input.get("text", "")
+    skill_match = match_skills(text)
+    completion = await client.chat.completions.create(
+        model=model_config.get("model", "llama-3.1-8b-instant"),
+        temperature=model_config.get("temperature", 0.2),
+        messages=_build_messages(text, input.get("jd_prompt"), skill_match),
+    )
+    return _to_output(completion, skill_match)
+
+
+def _build_messages(text: str, jd_prompt: str | None, skill_match: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are an expert resume analyst covering technical, semantic and psychometric evaluation. "
+                """RETURN FORMAT: JSON object with
+                - technical: object with
+                    - technicalSummary: A 2 line summary technical details.
+                    - experienceLevel: An overall true experience level classification (Junior, Mid, Senior, Manager, CTO, COO).
+                    - overallScore: A score representing the overall technical fit. (0-100)
+                - semantic: object with
+                    - semanticSummary: A 2-3 line summary of the document's meaning and implications.
+                    - keyThemes: A list of the main themes or topics present in the document. MAX 3
+                    - overallSentiment: An overall sentiment classification (e.g., Positive, Negative, Neutral)
+                - psychometric: object with
+                    - psychologicalTraits: The individual's psychological traits. MAX 3.
+                    - risks: potential risks or concerns from the psychological profile. MAX 3
+                    - trends: notable trends or patterns in the psychological traits. MAX 3
+                - summary: 3-4 line combined summary with technical semantic psychometric
+                - score: (0-100)
+                """
+                "Skills already detected in the document (do not list them again):\n"
+                f"- {skill_match or 'none'}\n"
+                "Evaluation Criteria (optional):\n"
+                f"- Job Description: {jd_prompt}\n\n"
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                "Analyze the following resume text in a single pass: technical details and skills, "
+                "contextual meaning and sentiment, psychological traits, and an overall summary and score.\n\n"
+                f"Document Text:\n{text}\n\n"
+                "Return JSON only."
+            ),
+        },
+    ]
+
+
+def _to_output(completion, skill_match: str) -> Optional[FusedAnalysisOutput]:
+    try:
+        logger.debug("fused_analysis_response", extra={"response": completion.choices[0].message.content})
+        content = completion.choices[0].message.content or "{}"
+        parsed = parse_json_block(content) or {}
+        return as_fused_analysis_response(parsed, skill_match=skill_match)
+    except Exception:
+        logger.exception("fused_analysis_parsing_failed")
+        return None
+
+
+def as_fused_analysis_response(
+    value,
+    skill_match: str | None = None,
+) -> Optional[FusedAnalysisOutput]:
+    logger.debug("validating_fused_analysis_response", extra={"value": value})
+    if not isinstance(value, dict):
+        return None
+
+    technical = as_technical_analysis_response(value.get("technical"), skill_match=skill_match)
+    semantic = as_semantic_analysis_response(value.get("semantic"))
+    psychometric = as_psychometric_analysis_response(value.get("psychometric"))
+    summary_text = value.get("summary")
+    score = value.get("score")
+    if None in (technical, semantic, psychometric, summary_text, score):
+        raise ValueError("Incomplete fused response from model.")
+
+    return {
+        "technical": {**technical, "error": None, "code": 200},
+        "semantic": {**semantic, "error": None, "code": 200},
+        "psychometric": {**psychometric, "error": None, "code": 200},
+        "summary": summary_text,
+        "score": int(score),
+    }
@@ -0,0 +1,152 @@
+import logging
+import os
+import time
+from bisect import bisect_left
+from functools import wraps
+
+import redis
+
+logger = logging.getLogger("backend.analysis.metrics")
+
+# Metrics live in Redis so API and every Celery worker process feed the same
+# series; GET /metrics renders them in the Prometheus text format.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_QUEUES = ("extraction", "analysis")
+
+_PREFIX = "metrics"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRICS = {
+    "analysis_stage_seconds": ("histogram", "Wall time per pipeline stage (extraction, LLM stages, summary, sqlite_log)."),
+    "analysis_queue_wait_seconds": ("histogram", "Time a Celery task waited in its queue before starting."),
+    "redis_op_seconds": ("histogram", "Latency of analysis.store Redis operations."),
+    "analysis_retries_total": ("counter", "Celery task retries scheduled, by kind."),
+    "llm_rate_limited_total": ("counter", "HTTP 429 / quota responses from LLM providers."),
+    "analysis_parse_failures_total": ("counter", "Stage responses that could not be parsed or validated."),
+    "extraction_cache_total": ("counter", "PDF extraction cache lookups by result (hit/miss)."),
+}
+
+
+def _redis():
+    from analysis.store import r  # late import: store itself is instrumented
+    return r
+
+
+def _labels(labels: dict | None) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in sorted((labels or {}).items()))
+
+
+def observe(name: str, seconds: float, **labels):
+    if not METRICS_ENABLED:
+        return
+    series = _labels(labels)
+    index = bisect_left(BUCKETS, seconds)
+    le = repr(BUCKETS[index]) if index < len(BUCKETS) else "+Inf"
+    try:
+        pipe = _redis().pipeline(transaction=False)
+        key = f"{_PREFIX}:{name}"
+        pipe.hincrby(key, f"{series}|{le}", 1)
+        pipe.hincrbyfloat(key, f"{series}|sum", seconds)
+        pipe.hincrby(key, f"{series}|count", 1)
+        pipe.execute()
+    except redis.RedisError:
+        logger.debug("metrics_observe_failed", extra={"metric": name}, exc_info=True)
+
+
+def inc(name: str, amount: float = 1, **labels):
+    if not METRICS_ENABLED:
+        return
+    try:
+        _redis().hincrbyfloat(f"{_PREFIX}:{name}", _labels(labels), amount)
+    except redis.RedisError:
+        logger.debug("metrics_inc_failed", extra={"metric": name}, exc_info=True)
+
+
+def timed(name: str, **labels):
+    """Decorator observing the wrapped call's duration into histogram ``name``."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - started, **labels)
+        return wrapper
+    return decorator
+
+
+def _series(name: str, labels: str) -> str:
+    return f"{name}{{{labels}}}" if labels else name
+
+
+def _number(value) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _decode(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _render_histogram(name: str, fields: dict) -> list[str]:
+    series: dict[str, dict[str, float]] = {}
+    for field, value in fields.items():
+        labels, _, part = _decode(field).rpartition("|")
+        series.setdefault(labels, {})[part] = float(value)
+    lines = []
+    for labels, parts in sorted(series.items()):
+        prefix = f"{labels}," if labels else ""
+        cumulative = 0.0
+        for le in [*(repr(b) for b in BUCKETS), "+Inf"]:
+            cumulative += parts.get(le, 0.0)
+            lines.append(f'{name}_bucket{{{prefix}le="{le}"}} {_number(cumulative)}')
+        lines.append(f"{_series(name + '_sum', labels)} {_number(parts.get('sum', 0.0))}")
+        lines.append(f"{_series(name + '_count', labels)} {_number(parts.get('count', 0.0))}")
+    return lines
+
+
+def _queue_depths() -> dict[str, int]:
+    from utils.setup import broker_url
+    if not broker_url:
+        return {}
+    broker = redis.Redis.from_url(broker_url)
+    try:
+        return {queue: broker.llen(queue) for queue in METRICS_QUEUES}
+    finally:
+        broker.close()
+
+
+def render() -> str:
+    """Prometheus text exposition of every metric."""
+    from analysis.cache import cache_stats
+
+    # A Redis error drops the affected families instead of failing the scrape.
+    r = _redis()
+    lines = []
+    for name, (kind, help_text) in METRICS.items():
+        try:
+            fields = r.hgetall(f"{_PREFIX}:{name}")
+        except redis.RedisError:
+            logger.warning("metrics_render_failed", extra={"metric": name}, exc_info=True)
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        if kind == "histogram":
+            lines += _render_histogram(name, fields)
+        else:
+            lines += [f"{_series(name, _decode(k))} {_number(v)}" for k, v in sorted(fields.items())]
+
+    try:
+        stats = cache_stats()
+    except redis.RedisError:
+        logger.warning("metrics_cache_stats_failed", exc_info=True)
+    else:
+        for name, key in (("llm_cache_hits_total", "hits"), ("llm_cache_misses_total", "misses")):
+            lines += [f"# HELP {name} LLM response cache {key}.", f"# TYPE {name} counter", f"{name} {stats.get(key, 0)}"]
+
+    lines += ["# HELP celery_queue_depth Messages waiting in a Celery queue.", "# TYPE celery_queue_depth gauge"]
+    try:
+        lines += [f'celery_queue_depth{{queue="{q}"}} {depth}' for q, depth in _queue_depths().items()]
+    except redis.RedisError:
+        logger.warning("metrics_queue_depth_failed", exc_info=True)
+    return "\n".join(lines) + "\n"
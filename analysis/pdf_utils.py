@@ -1,30 +0,0 @@
-import io
-import os
-import tempfile
-from pdfminer3.layout import LAParams
-from pdfminer3.pdfpage import PDFPage
-from pdfminer3.pdfinterp import PDFResourceManager, PDFPageInterpreter
-from pdfminer3.converter import TextConverter
-
-
-def pdf_bytes_to_text(file_bytes: bytes) -> str:
-    tmp_path = None
-    try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            tmp.write(file_bytes)
-            tmp_path = tmp.name
-
-        resource_manager = PDFResourceManager()
-        fake_file_handle = io.StringIO()
-        converter = TextConverter(resource_manager, fake_file_handle, laparams=LAParams())
-        page_interpreter = PDFPageInterpreter(resource_manager, converter)
-        with open(tmp_path, "rb") as fh:
-            for page in PDFPage.get_pages(fh, caching=True, check_extractable=True):
-                page_interpreter.process_page(page)
-            text = fake_file_handle.getvalue()
-        converter.close()
-        fake_file_handle.close()
-        return text
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
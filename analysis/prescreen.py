@@ -0,0 +1,67 @@
+import os
+import re
+
+# Local keyword gate run before any LLM call.
+PRESCREEN_ENABLED = os.getenv("PRESCREEN_ENABLED", "1") == "1"
+# Only screen out when the pre-score sits this many points under the threshold.
+PRESCREEN_MARGIN = int(os.getenv("PRESCREEN_MARGIN", "25"))
+# Too few JD terms make the overlap score meaningless.
+PRESCREEN_MIN_TERMS = int(os.getenv("PRESCREEN_MIN_TERMS", "3"))
+
+_SKILL_SPLIT_RE = re.compile(r"[,;|\n]+|\band\b")
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = {
+    "about", "across", "also", "and", "are", "based", "being", "build", "building", "can", "candidate",
+    "company", "core", "etc", "example", "examples", "experience", "for", "from", "good", "have", "help",
+    "key", "knowledge", "must", "our", "plus", "preferred", "required", "requirements", "role", "skills",
+    "strong", "team", "that", "the", "their", "this", "will", "with", "work", "working", "years", "you",
+    "your",
+}
+
+
+def _skill_terms(jd_prompt: str | None) -> set[str]:
+    terms = set()
+    for raw in _SKILL_SPLIT_RE.split((jd_prompt or "").lower()):
+        term = raw.split(":")[-1].strip(" .-")
+        if term and term not in STOPWORDS:
+            terms.add(term)
+    return terms
+
+
+def _description_terms(job_description: str | None) -> set[str]:
+    words = _WORD_RE.findall((job_description or "").lower())
+    return {w for w in words if len(w) > 2 and w not in STOPWORDS and not w.isdigit()}
+
+
+def _contains(haystack: str, term: str) -> bool:
+    return re.search(rf"(?<![a-z0-9]){re.escape(term)}(?![a-z0-9+#])", haystack) is not None
+
+
+def prescreen_score(text: str, jd_prompt: str | None = None, criteria: dict | None = None) -> dict:
+    """Score (0-100) how much of the JD vocabulary appears in the resume text.
+
+    Explicit skills from ``jd_prompt`` weigh twice as much as words picked
+    from the job description.
+    """
+    haystack = (text or "").lower()
+    skills = _skill_terms(jd_prompt)
+    described = _description_terms((criteria or {}).get("job_description")) - skills
+
+    matched = sorted(term for term in skills | described if _contains(haystack, term))
+    matched_set = set(matched)
+    weight = 2 * len(skills) + len(described)
+    earned = 2 * len(skills & matched_set) + len(described & matched_set)
+    return {
+        "score": round(100 * earned / weight) if weight else None,
+        "terms": len(skills) + len(described),
+        "matched": matched,
+        "missing": sorted(skills - matched_set),
+    }
+
+
+def should_screen_out(prescreen: dict, threshold: int | None) -> bool:
+    if not PRESCREEN_ENABLED or threshold is None or prescreen["score"] is None:
+        return False
+    if prescreen["terms"] < PRESCREEN_MIN_TERMS:
+        return False
+    return prescreen["score"] < threshold - PRESCREEN_MARGIN
@@ -1,9 +1,12 @@
 from typing import Optional
 from analysis.utils import _coerce_to_str, parse_json_block, retry_policy
+from analysis.ratelimit import RateLimited
 from groq import RateLimitError
 from .types import PsychometricAnalysisInput, PsychometricAnalysisOutput
 import logging
 logger = logging.getLogger("backend.analysis.psychometric")
+# Bump when the prompt below changes so cached outputs are not reused.
+PROMPT_VERSION = 1
 
 
 def psychometric_analysis(
@@ -23,34 +26,57 @@ def psychometric_analysis(
         completion = client.chat.completions.create(
             model=model,
             temperature=temperature,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert in psychometric analysis evaluation by reading text and CV. "
-                        """Return FORMAT: JSON object with
-                        - psychologicalTraits: Analysis of the individual's psychological traits based on the provided text. MAX 3.
-                        - risks: potential risks or concerns from the individual's psychological profile. MAX 3
-                        - trends: notable trends or patterns in the individual's psychological traits. MAX 3
-                        """
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Analyze the following text to identify psychological traits, "
-                        "potential risks, and trends.\n\n"
-                        f"Text:\n{input['text']}\n\n"
-                        "Return JSON only."
-                    ),
-                },
-            ],
+            messages=_build_messages(input.get("text", "")),
         )
-    except RateLimitError as exc:
+    except (RateLimitError, RateLimited) as exc:
         if task is not None:
             return retry_policy(task, exc, "rate_limit")
         raise
 
+    return _to_output(completion)
+
+
+async def psychometric_analysis_async(
+    input: PsychometricAnalysisInput,
+) -> PsychometricAnalysisOutput:
+    logger.debug("psychometric_analysis_async_request", extra={"input": input})
+
+    model_config = input.get("modelConfig", {})
+    client = model_config["client"]
+    completion = await client.chat.completions.create(
+        model=model_config.get("model", "llama-3.1-8b-instant"),
+        temperature=model_config.get("temperature", 0.2),
+        messages=_build_messages(input.get("text", "")),
+    )
+    return _to_output(completion)
+
+
+def _build_messages(text: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are an expert in psychometric analysis evaluation by reading text and CV. "
+                """Return FORMAT: JSON object with
+                - psychologicalTraits: Analysis of the individual's psychological traits based on the provided text. MAX 3.
+                - risks: potential risks or concerns from the individual's psychological profile. MAX 3
+                - trends: notable trends or patterns in the individual's psychological traits. MAX 3
+                """
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                "Analyze the following text to identify psychological traits, "
+                "potential risks, and trends.\n\n"
+                f"Text:\n{text}\n\n"
+                "Return JSON only."
+            ),
+        },
+    ]
+
+
+def _to_output(completion) -> PsychometricAnalysisOutput:
     try:
         logger.debug("psychometric_analysis_response", extra={"response": completion.choices[0].message.content})
         content = completion.choices[0].message.content or "{}"
@@ -75,6 +101,7 @@ def psychometric_analysis(
             "code": 500
         }
 
+
 def as_psychometric_analysis_response(
     value,
 ) -> Optional[PsychometricAnalysisOutput]:
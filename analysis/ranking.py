@@ -0,0 +1,73 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+from analysis.prescreen import STOPWORDS
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+
+def _tokenize(text: str) -> list[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def build_query(jd_prompt: str | None = None, criteria: dict | None = None) -> str:
+    criteria = criteria or {}
+    parts = [jd_prompt, criteria.get("job_description"), criteria.get("role")]
+    return "\n".join(str(p) for p in parts if p)
+
+
+def rank_texts(texts: dict[str, str], query: str, top_k: int | None = None) -> list[dict]:
+    """Rank ``{doc_id: text}`` by TF-IDF cosine similarity to ``query``.
+
+    The corpus is held as a sparse COO triple (doc, term, weight) and every
+    document is scored against the query in one vectorized pass.
+    """
+    doc_ids = list(texts)
+    if not doc_ids:
+        return []
+
+    vocab: dict[str, int] = {}
+    rows, cols, counts = [], [], []
+    for row, doc_id in enumerate(doc_ids):
+        for term, count in Counter(_tokenize(texts[doc_id])).items():
+            rows.append(row)
+            cols.append(vocab.setdefault(term, len(vocab)))
+            counts.append(count)
+
+    n_docs, n_terms = len(doc_ids), len(vocab)
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.float64)
+
+    # Smoothed idf and sublinear tf, as in scikit-learn's TfidfVectorizer.
+    df = np.bincount(cols, minlength=n_terms)
+    idf = np.log((1 + n_docs) / (1 + df)) + 1.0
+    weights = (1.0 + np.log(counts)) * idf[cols]
+    doc_norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=n_docs))
+
+    query_vec = np.zeros(n_terms, dtype=np.float64)
+    for term, count in Counter(_tokenize(query)).items():
+        col = vocab.get(term)
+        if col is not None:
+            query_vec[col] = (1.0 + np.log(count)) * idf[col]
+    query_norm = np.linalg.norm(query_vec)
+
+    if query_norm == 0:
+        scores = np.zeros(n_docs)
+    else:
+        dots = np.bincount(rows, weights=weights * query_vec[cols], minlength=n_docs)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(doc_norms > 0, dots / (doc_norms * query_norm), 0.0)
+
+    k = n_docs if not top_k else min(top_k, n_docs)
+    if k < n_docs:
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+    else:
+        top = np.argsort(-scores, kind="stable")
+    return [
+        {"file_id": doc_ids[i], "score": round(float(scores[i]) * 100, 2), "rank": rank}
+        for rank, i in enumerate(top, start=1)
+    ]
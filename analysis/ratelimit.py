@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+import redis
+
+from analysis.metrics import inc
+from analysis.store import r
+
+logger = logging.getLogger("backend.analysis.ratelimit")
+
+# Cluster-wide token bucket per (provider, model), shared by API and workers
+# through Redis. The refill rate adapts AIMD-style: +1 rpm per success,
+# halved (and paused for Retry-After) on every 429.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "5"))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "30"))  # seconds a caller may block
+RATE_LIMIT_MAX_ATTEMPTS = int(os.getenv("RATE_LIMIT_MAX_ATTEMPTS", "3"))
+RATE_LIMIT_DEFAULT_BACKOFF = float(os.getenv("RATE_LIMIT_DEFAULT_BACKOFF", "10"))
+RATE_LIMIT_INCREASE_RPM = float(os.getenv("RATE_LIMIT_INCREASE_RPM", "1"))
+RATE_LIMIT_DECREASE_FACTOR = float(os.getenv("RATE_LIMIT_DECREASE_FACTOR", "0.5"))
+
+_ACQUIRE = r.register_script("""
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'rate', 'blocked_until')
+local rate = tonumber(b[3]) or tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local blocked = tonumber(b[4]) or 0
+if blocked > now then
+    return tostring(blocked - now)
+end
+local tokens = tonumber(b[1]) or capacity
+local ts = tonumber(b[2]) or now
+tokens = math.min(capacity, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now, 'rate', rate)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+""")
+
+_FEEDBACK = r.register_script("""
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or tonumber(ARGV[1])
+local min_rate, max_rate = tonumber(ARGV[2]), tonumber(ARGV[3])
+if ARGV[4] == 'throttle' then
+    rate = math.max(min_rate, rate * tonumber(ARGV[5]))
+    redis.call('HSET', KEYS[1], 'tokens', 0, 'ts', now, 'blocked_until', now + tonumber(ARGV[6]))
+else
+    rate = math.min(max_rate, rate + tonumber(ARGV[5]))
+end
+redis.call('HSET', KEYS[1], 'rate', rate)
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(rate * 60)
+""")
+
+
+# Seconds spent blocked in acquire(), added to the list installed by
+# ``track_wait`` (the usage recorder reports it apart from LLM latency).
+_waited: ContextVar[list[float] | None] = ContextVar("ratelimit_waited", default=None)
+
+
+@contextmanager
+def track_wait():
+    """Collect the limiter wait of the calls made inside the block; yields a one-item list."""
+    waited = [0.0]
+    token = _waited.set(waited)
+    try:
+        yield waited
+    finally:
+        _waited.reset(token)
+
+
+def _note_wait(seconds: float):
+    waited = _waited.get()
+    if waited is not None:
+        waited[0] += seconds
+
+
+class RateLimited(Exception):
+    """Raised when the bucket would make the caller wait longer than allowed."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limited; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def _bucket(provider: str, model: str) -> str:
+    return f"ratelimit:{provider}:{model}"
+
+
+def _limits(provider: str) -> tuple[float, float, float]:
+    """(initial, min, max) requests per second for a provider."""
+    prefix = f"RATE_LIMIT_{provider.upper()}"
+    rpm = float(os.getenv(f"{prefix}_RPM", "30"))
+    min_rpm = float(os.getenv(f"{prefix}_MIN_RPM", "2"))
+    max_rpm = float(os.getenv(f"{prefix}_MAX_RPM", str(rpm * 4)))
+    return rpm / 60, min_rpm / 60, max_rpm / 60
+
+
+def reserve(provider: str, model: str) -> float:
+    """Take a token if one is free; otherwise return the seconds to wait."""
+    rate, _, _ = _limits(provider)
+    try:
+        return float(_ACQUIRE(keys=[_bucket(provider, model)], args=[rate, RATE_LIMIT_BURST]))
+    except redis.RedisError:
+        logger.warning("rate_limit_acquire_failed", extra={"provider": provider, "model": model}, exc_info=True)
+        return 0.0
+
+
+def acquire(provider: str, model: str, max_wait: float = RATE_LIMIT_MAX_WAIT):
+    deadline = time.monotonic() + max_wait
+    while True:
+        wait = reserve(provider, model)
+        if wait <= 0:
+            return
+        if time.monotonic() + wait > deadline:
+            raise RateLimited(wait)
+        time.sleep(wait)
+        _note_wait(wait)
+
+
+async def acquire_async(provider: str, model: str, max_wait: float = RATE_LIMIT_MAX_WAIT):
+    deadline = time.monotonic() + max_wait
+    while True:
+        wait = await asyncio.to_thread(reserve, provider, model)
+        if wait <= 0:
+            return
+        if time.monotonic() + wait > deadline:
+            raise RateLimited(wait)
+        await asyncio.sleep(wait)
+        _note_wait(wait)
+
+
+def _feedback(provider: str, model: str, kind: str, amount: float, retry_after: float = 0.0):
+    rate, min_rate, max_rate = _limits(provider)
+    try:
+        rpm = float(_FEEDBACK(
+            keys=[_bucket(provider, model)],
+            args=[rate, min_rate, max_rate, kind, amount, retry_after],
+        ))
+    except redis.RedisError:
+        logger.warning("rate_limit_feedback_failed", extra={"provider": provider, "model": model}, exc_info=True)
+        return
+    if kind == "throttle":
+        logger.info("rate_limit_throttled", extra={"provider": provider, "model": model, "rpm": rpm, "retry_after": retry_after})
+
+
+def record_success(provider: str, model: str):
+    _feedback(provider, model, "success", RATE_LIMIT_INCREASE_RPM / 60)
+
+
+def record_throttle(provider: str, model: str, retry_after: float):
+    inc("llm_rate_limited_total", provider=provider)
+    _feedback(provider, model, "throttle", RATE_LIMIT_DECREASE_FACTOR, retry_after)
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    if isinstance(exc, RateLimited):
+        return True
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    # google.api_core raises ResourceExhausted (HTTP 429) for Gemini quota errors.
+    return status == 429 or type(exc).__name__ == "ResourceExhausted"
+
+
+def retry_after_seconds(exc: Exception, default: float = RATE_LIMIT_DEFAULT_BACKOFF) -> float:
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is None:
+        headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+        retry_after = headers.get("retry-after")
+    try:
+        return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimitedClient:
+    """``chat.completions.create`` gated by the shared bucket.
+
+    A 429 retries only this call, after Retry-After, before giving up and
+    letting the caller reschedule.
+    """
+
+    def __init__(self, client, provider: str):
+        self._client = client
+        self.provider = provider
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _create(self, *, model: str, **kwargs):
+        for attempt in range(1, RATE_LIMIT_MAX_ATTEMPTS + 1):
+            acquire(self.provider, model)
+            try:
+                completion = self._client.chat.completions.create(model=model, **kwargs)
+            except Exception as exc:
+                if not is_rate_limit_error(exc):
+                    raise
+                retry_after = retry_after_seconds(exc)
+                record_throttle(self.provider, model, retry_after)
+                if attempt == RATE_LIMIT_MAX_ATTEMPTS or retry_after > RATE_LIMIT_MAX_WAIT:
+                    raise
+                continue
+            record_success(self.provider, model)
+            return completion
+
+
+class AsyncRateLimitedClient(RateLimitedClient):
+    def __init__(self, client, provider: str):
+        super().__init__(client, provider)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_async))
+
+    async def _create_async(self, *, model: str, **kwargs):
+        for attempt in range(1, RATE_LIMIT_MAX_ATTEMPTS + 1):
+            await acquire_async(self.provider, model)
+            try:
+                completion = await self._client.chat.completions.create(model=model, **kwargs)
+            except Exception as exc:
+                if not is_rate_limit_error(exc):
+                    raise
+                retry_after = retry_after_seconds(exc)
+                await asyncio.to_thread(record_throttle, self.provider, model, retry_after)
+                if attempt == RATE_LIMIT_MAX_ATTEMPTS or retry_after > RATE_LIMIT_MAX_WAIT:
+                    raise
+                continue
+            await asyncio.to_thread(record_success, self.provider, model)
+            return completion
@@ -0,0 +1,272 @@
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import SimpleNamespace
+
+from analysis.ratelimit import RateLimited
+
+logger = logging.getLogger("backend.analysis.router")
+
+# Hedging: when the primary provider is slower than its own recent
+# HEDGE_PERCENTILE latency, send the same request to the next provider and
+# keep whichever answers first.
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "1") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", "1.0"))
+HEDGE_DEFAULT_DELAY = float(os.getenv("HEDGE_DEFAULT_DELAY", "10.0"))  # until enough samples exist
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_POOL_SIZE = int(os.getenv("HEDGE_POOL_SIZE", "16"))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN", "30"))
+
+
+class AllProvidersUnavailable(RuntimeError):
+    pass
+
+
+class CircuitOpen(RuntimeError):
+    """The provider's breaker refused the call (it opened, or its probe was taken, after planning)."""
+
+
+class _LatencyWindow:
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def hedge_delay(self) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        index = min(len(samples) - 1, int(len(samples) * HEDGE_PERCENTILE / 100))
+        return max(HEDGE_MIN_DELAY, samples[index])
+
+
+class CircuitBreaker:
+    """Opens after BREAKER_FAILURES consecutive errors; lets one probe through after the cooldown."""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _cooled_down(self) -> bool:
+        return time.monotonic() - self._opened_at >= BREAKER_COOLDOWN and not self._probing
+
+    def is_available(self) -> bool:
+        """Whether a call would be let through right now; claims nothing."""
+        with self._lock:
+            return self._opened_at is None or self._cooled_down()
+
+    def claim(self) -> str | None:
+        """Claim a call slot right before calling: "call", "probe" or None if refused.
+
+        A "probe" must be handed back with ``release_probe`` once the call ends,
+        however it ends.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return "call"
+            if self._cooled_down():
+                self._probing = True
+                return "probe"
+            return None
+
+    def release_probe(self):
+        # Only the probe holder clears the flag, so a cancelled or dropped
+        # probe can't leave the breaker half-open for good.
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= BREAKER_FAILURES:
+                if self._opened_at is None:
+                    logger.warning("circuit_opened", extra={"provider": self.provider})
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "half-open" if self._probing else "open"
+
+
+_latency: dict[str, _LatencyWindow] = {}
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def _window(provider: str) -> _LatencyWindow:
+    return _latency.setdefault(provider, _LatencyWindow())
+
+
+def _breaker(provider: str) -> CircuitBreaker:
+    return _breakers.setdefault(provider, CircuitBreaker(provider))
+
+
+def router_stats() -> dict:
+    return {
+        provider: {"breaker": _breaker(provider).state, "hedge_delay": _window(provider).hedge_delay()}
+        for provider in set(_latency) | set(_breakers)
+    }
+
+
+class ProviderRouter:
+    """``chat.completions.create`` over several providers with hedging and failover.
+
+    The requested model goes to the primary provider; fallbacks use their own
+    default model since model names are provider specific.
+    """
+
+    def __init__(self, clients: dict, order: list[str], fallback_models: dict[str, str]):
+        self._clients = clients
+        self._order = order
+        self._fallback_models = fallback_models
+        self.provider = order[0]
+        # Threads start on first submit; building the pool here means
+        # concurrent first calls can't race to create two of them.
+        self._pool = ThreadPoolExecutor(max_workers=HEDGE_POOL_SIZE, thread_name_prefix="llm-hedge")
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _plan(self, model: str) -> list[tuple[str, str]]:
+        plan = []
+        for provider in self._order:
+            if not _breaker(provider).is_available():
+                continue
+            plan.append((provider, model if provider == self.provider else self._fallback_models[provider]))
+        if not plan:
+            raise AllProvidersUnavailable("All LLM providers are failing; circuit breakers are open.")
+        return plan
+
+    def _call(self, provider: str, model: str, kwargs: dict):
+        breaker = _breaker(provider)
+        slot = breaker.claim()
+        if slot is None:
+            raise CircuitOpen(f"{provider} circuit is open")
+        started = time.perf_counter()
+        try:
+            completion = self._clients[provider].chat.completions.create(model=model, **kwargs)
+        except RateLimited:
+            # Throttling (our bucket, or 429s the limiter already retried) is
+            # not an outage; the caller reschedules instead.
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            _window(provider).add(time.perf_counter() - started)
+            breaker.record_success()
+            return completion
+        finally:
+            if slot == "probe":
+                breaker.release_probe()
+
+    def _submit(self, provider: str, model: str, kwargs: dict):
+        # Pool threads start with an empty context; carry the caller's over so
+        # per-call accounting (e.g. limiter wait) still reaches it.
+        return self._pool.submit(contextvars.copy_context().run, self._call, provider, model, kwargs)
+
+    def _create(self, *, model: str, **kwargs):
+        plan = self._plan(model)
+        if len(plan) == 1:
+            return self._call(*plan[0], kwargs)
+
+        (primary_provider, _), backup_plan = plan[0], plan[1]
+        primary = self._submit(*plan[0], kwargs)
+        done, _ = wait([primary], timeout=_window(primary_provider).hedge_delay())
+        if done:
+            if primary.exception() is None:
+                return primary.result()
+            logger.warning("provider_failover", extra={"from": primary_provider, "to": backup_plan[0]})
+            return self._call(*backup_plan, kwargs)
+
+        logger.info("provider_hedge", extra={"primary": primary_provider, "backup": backup_plan[0]})
+        pending = {primary, self._submit(*backup_plan, kwargs)}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # A running HTTP call can't be interrupted; its result is simply dropped.
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+
+
+class AsyncProviderRouter(ProviderRouter):
+    def __init__(self, clients: dict, order: list[str], fallback_models: dict[str, str]):
+        super().__init__(clients, order, fallback_models)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_async))
+
+    async def _call_async(self, provider: str, model: str, kwargs: dict):
+        breaker = _breaker(provider)
+        slot = breaker.claim()
+        if slot is None:
+            raise CircuitOpen(f"{provider} circuit is open")
+        started = time.perf_counter()
+        try:
+            completion = await self._clients[provider].chat.completions.create(model=model, **kwargs)
+        except (asyncio.CancelledError, RateLimited):
+            # A lost hedge, a cancelled caller or throttling says nothing about
+            # the provider's health.
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            _window(provider).add(time.perf_counter() - started)
+            breaker.record_success()
+            return completion
+        finally:
+            if slot == "probe":
+                breaker.release_probe()
+
+    async def _create_async(self, *, model: str, **kwargs):
+        plan = self._plan(model)
+        if len(plan) == 1:
+            return await self._call_async(*plan[0], kwargs)
+
+        (primary_provider, _), backup_plan = plan[0], plan[1]
+        primary = asyncio.create_task(self._call_async(*plan[0], kwargs))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=_window(primary_provider).hedge_delay())
+            if done:
+                if primary.exception() is None:
+                    return primary.result()
+                logger.warning("provider_failover", extra={"from": primary_provider, "to": backup_plan[0]})
+                return await self._call_async(*backup_plan, kwargs)
+
+            logger.info("provider_hedge", extra={"primary": primary_provider, "backup": backup_plan[0]})
+            pending.add(asyncio.create_task(self._call_async(*backup_plan, kwargs)))
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            # Cancels the losing request (or both, if our caller was cancelled).
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,65 @@
+import json
+import os
+
+from analysis.compaction import estimate_tokens
+
+# Per-stage model routing. Extraction stages run on the fast tier; the
+# summary/score (and long documents) get the large tier.
+MODEL_ROUTING_ENABLED = os.getenv("MODEL_ROUTING_ENABLED", "1") == "1"
+# Documents up to this many estimated tokens are routed as "short".
+ROUTING_SHORT_TOKENS = int(os.getenv("ROUTING_SHORT_TOKENS", "1200"))
+
+# Model per provider and tier; override with MODEL_TIER_<PROVIDER>_<TIER>.
+MODEL_TIERS = {
+    "groq": {"fast": "llama-3.1-8b-instant", "large": "llama-3.3-70b-versatile"},
+    "gemini": {"fast": "gemini-2.5-flash-lite", "large": "gemini-2.5-flash"},
+}
+
+# stage -> (tier for short documents, tier for long documents).
+# MODEL_ROUTES takes a JSON object of the same shape, e.g. {"technical": ["large", "large"]}.
+DEFAULT_ROUTES = {
+    "technical": ("fast", "large"),
+    "semantic": ("fast", "fast"),
+    "psychometric": ("fast", "fast"),
+    "fused": ("fast", "large"),
+    "summary": ("large", "large"),
+}
+ROUTES = {
+    **DEFAULT_ROUTES,
+    **{stage: tuple(tiers) for stage, tiers in json.loads(os.getenv("MODEL_ROUTES") or "{}").items()},
+}
+
+
+def tier_model(provider: str, tier: str) -> str:
+    override = os.getenv(f"MODEL_TIER_{provider.upper()}_{tier.upper()}")
+    return override or MODEL_TIERS.get(provider, MODEL_TIERS["groq"])[tier]
+
+
+def _length(text: str) -> str:
+    return "short" if estimate_tokens(text) <= ROUTING_SHORT_TOKENS else "long"
+
+
+def route_models(
+    provider: str,
+    text: str,
+    model: str | None = None,
+    default_model: str | None = None,
+    stage_texts: dict[str, str] | None = None,
+) -> dict:
+    """Pick a model for every stage from the routing table.
+
+    A caller-chosen ``model`` stands in for the large tier. With routing
+    disabled every stage runs on ``model`` (or ``default_model``), as before.
+    Stages listed in ``stage_texts`` are routed on the length of their own
+    input rather than the whole document.
+    """
+    length = _length(text)
+    stages = {}
+    for stage, (short_tier, long_tier) in ROUTES.items():
+        if not MODEL_ROUTING_ENABLED:
+            stages[stage] = {"tier": "pinned", "model": model or default_model or tier_model(provider, "fast")}
+            continue
+        stage_length = _length(stage_texts[stage]) if stage_texts and stage in stage_texts else length
+        tier = short_tier if stage_length == "short" else long_tier
+        stages[stage] = {"tier": tier, "model": model if model and tier == "large" else tier_model(provider, tier)}
+    return {"length": length, "stages": stages}
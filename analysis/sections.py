@@ -0,0 +1,143 @@
+import json
+import os
+import re
+
+from analysis.compaction import estimate_tokens
+
+# Split resume text into typed sections so each stage prompts with only the
+# parts it needs. Runs on the compacted text, so it is pure string work.
+SECTIONS_ENABLED = os.getenv("SECTIONS_ENABLED", "1") == "1"
+# Below this many estimated tokens the whole document is cheap enough to send as is.
+SECTIONS_MIN_TOKENS = int(os.getenv("SECTIONS_MIN_TOKENS", "400"))
+
+# section type -> heading phrases (compared lowercased, without punctuation).
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "about", "overview", "personal statement"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience",
+                   "internships", "internship"),
+    "education": ("education", "academic background", "academics", "qualifications",
+                  "educational qualifications", "academic qualifications"),
+    "skills": ("skills", "technical skills", "key skills", "core skills", "core competencies",
+               "competencies", "technologies", "tech stack", "tools", "tools and technologies",
+               "expertise", "areas of expertise"),
+    "projects": ("projects", "personal projects", "academic projects", "key projects", "selected projects"),
+    "certifications": ("certifications", "certificates", "licenses", "licenses and certifications", "courses"),
+    "achievements": ("achievements", "awards", "honors", "honours", "awards and achievements",
+                     "accomplishments"),
+    "publications": ("publications", "research", "papers"),
+    "activities": ("activities", "extracurricular activities", "volunteering", "volunteer experience",
+                   "volunteer work", "leadership", "positions of responsibility"),
+    "interests": ("interests", "hobbies", "hobbies and interests"),
+    "languages": ("languages",),
+}
+_HEADING_TYPES = {phrase: kind for kind, phrases in SECTION_HEADINGS.items() for phrase in phrases}
+# Longest first, so "work experience and internships" matches "work experience".
+_HEADING_PREFIXES = sorted(_HEADING_TYPES, key=len, reverse=True)
+
+# stage -> section types it receives, in document order. "header" is the text
+# above the first heading (name, contact, often an untitled summary).
+# STAGE_SECTIONS takes a JSON object of the same shape; a stage that is not
+# listed gets the full text.
+DEFAULT_STAGE_SECTIONS = {
+    "technical": ("skills", "experience", "projects", "certifications", "education"),
+    "semantic": ("header", "summary", "experience", "projects", "achievements"),
+    "psychometric": ("header", "summary", "experience", "activities", "achievements", "interests"),
+}
+STAGE_SECTIONS = {
+    **DEFAULT_STAGE_SECTIONS,
+    **{stage: tuple(kinds) for stage, kinds in json.loads(os.getenv("STAGE_SECTIONS") or "{}").items()},
+}
+
+_HEADING_CLEAN_RE = re.compile(r"[^a-z& ]+")
+_BULLET_RE = re.compile(r"^[\u2022\u00b7\u25aa\u25cf\u25e6\u2013*>-]\s*")
+_MAX_HEADING_WORDS = 5
+
+
+def _normalize_heading(text: str) -> str:
+    return " ".join(_HEADING_CLEAN_RE.sub(" ", text.lower().replace("&", " and ")).split())
+
+
+def _heading_type(line: str, prev_blank: bool) -> str | None:
+    """Section type if ``line`` looks like a heading, else None.
+
+    A known phrase alone on the line is a heading. A line that only starts
+    with one ("Leadership of the migration", "Tools used daily: Docker")
+    needs a layout cue too: all capitals, a trailing colon, or a blank line
+    before it with the phrase ending at a colon ("Skills: Python") or
+    extended by "and"/"&".
+    """
+    if not line or len(line) > 48 or len(line.split()) > _MAX_HEADING_WORDS or _BULLET_RE.match(line):
+        return None
+    normalized = _normalize_heading(line)
+    kind = _HEADING_TYPES.get(normalized)
+    if kind:
+        return kind
+    if prev_blank and ":" in line:
+        kind = _HEADING_TYPES.get(_normalize_heading(line.split(":", 1)[0]))
+        if kind:
+            return kind
+    caps_or_colon = line.isupper() or line.endswith(":")
+    for phrase in _HEADING_PREFIXES:
+        if normalized.startswith(phrase + " "):
+            if caps_or_colon or (prev_blank and normalized[len(phrase) + 1:].startswith("and ")):
+                return _HEADING_TYPES[phrase]
+            break
+    # Layout cues for headings we have no phrase for: a short isolated line in
+    # capitals, or one ending with a colon.
+    letters = [c for c in line if c.isalpha()]
+    if prev_blank and len(letters) >= 4 and caps_or_colon and not line[0].isdigit():
+        return "other"
+    return None
+
+
+def segment(text: str) -> list[dict]:
+    """Split ``text`` into ``[{"type", "heading", "text"}]`` in document order."""
+    sections = [{"type": "header", "heading": None, "lines": []}]
+    prev_blank = True
+    for line in (text or "").split("\n"):
+        stripped = line.strip()
+        kind = _heading_type(stripped, prev_blank)
+        if kind:
+            sections.append({"type": kind, "heading": stripped, "lines": []})
+        else:
+            sections[-1]["lines"].append(line)
+        prev_blank = not stripped
+    return [
+        {"type": s["type"], "heading": s["heading"], "text": "\n".join(s["lines"]).strip()}
+        for s in sections
+        if s["heading"] or "\n".join(s["lines"]).strip()
+    ]
+
+
+def _render(sections: list[dict]) -> str:
+    return "\n\n".join(
+        f"{s['heading']}\n{s['text']}".strip() if s["heading"] else s["text"]
+        for s in sections
+    )
+
+
+def stage_texts(text: str, stages=None) -> tuple[dict[str, str], dict]:
+    """Per-stage input text plus stats for logging.
+
+    Falls back to the full text for a stage when sectioning is disabled, the
+    document is short, no headings were recognised, or none of the stage's
+    sections are present.
+    """
+    stages = list(stages or STAGE_SECTIONS)
+    full_tokens = estimate_tokens(text)
+    if not SECTIONS_ENABLED or full_tokens < SECTIONS_MIN_TOKENS:
+        return {stage: text for stage in stages}, {"segmented": False, "tokens": full_tokens}
+
+    sections = segment(text)
+    if not any(s["type"] not in ("header", "other") for s in sections):
+        return {stage: text for stage in stages}, {"segmented": False, "tokens": full_tokens}
+
+    texts, stats = {}, {"segmented": True, "tokens": full_tokens, "sections": [s["type"] for s in sections], "stages": {}}
+    for stage in stages:
+        wanted = STAGE_SECTIONS.get(stage)
+        selected = [s for s in sections if s["type"] in wanted] if wanted else []
+        texts[stage] = _render(selected) if selected else text
+        stats["stages"][stage] = estimate_tokens(texts[stage])
+    return texts, stats
@@ -1,9 +1,12 @@
 from typing import Optional
 from analysis.utils import _coerce_to_str, parse_json_block, retry_policy
+from analysis.ratelimit import RateLimited
 from groq import RateLimitError
 from .types import SemanticAnalysisInput, SemanticAnalysisOutput
 import logging
 logger = logging.getLogger("backend.analysis.semantic")
+# Bump when the prompt below changes so cached outputs are not reused.
+PROMPT_VERSION = 1
 
 
 def semantic_analysis(
@@ -25,35 +28,58 @@ def semantic_analysis(
         completion = client.chat.completions.create(
             model=model,
             temperature=temperature,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert in analysing semantic analysis."
-                        """RETURN FORMAT: JSON Object with
-                        - semanticSummary: A 2-3 line summary of the document's meaning and implications.
-                        - keyThemes: A list of the main themes or topics present in the document. MAX 3
-                        - overallSentiment: An overall sentiment classification (e.g., Positive, Negative, Neutral)
-                        """
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Analyze the following document text to understand its "
-                        "contextual meaning, identify key themes, and determine "
-                        "the overall sentiment.\n\n"
-                        f"Document Text:\n{input['text']}\n\n"
-                        "Return JSON only."
-                    ),
-                },
-            ],
+            messages=_build_messages(input.get("text", "")),
         )
-    except RateLimitError as exc:
+    except (RateLimitError, RateLimited) as exc:
         if task is not None:
             return retry_policy(task, exc, "rate_limit")
         raise
-    # log response 
+
+    return _to_output(completion)
+
+
+async def semantic_analysis_async(
+    input: SemanticAnalysisInput,
+) -> SemanticAnalysisOutput:
+    logger.debug("semantic_analysis_async_request", extra={"input": input})
+
+    model_config = input.get("modelConfig", {})
+    client = model_config["client"]
+    completion = await client.chat.completions.create(
+        model=model_config.get("model", "llama-3.1-8b-instant"),
+        temperature=model_config.get("temperature", 0.2),
+        messages=_build_messages(input.get("text", "")),
+    )
+    return _to_output(completion)
+
+
+def _build_messages(text: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are an expert in analysing semantic analysis."
+                """RETURN FORMAT: JSON Object with
+                - semanticSummary: A 2-3 line summary of the document's meaning and implications.
+                - keyThemes: A list of the main themes or topics present in the document. MAX 3
+                - overallSentiment: An overall sentiment classification (e.g., Positive, Negative, Neutral)
+                """
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                "Analyze the following document text to understand its "
+                "contextual meaning, identify key themes, and determine "
+                "the overall sentiment.\n\n"
+                f"Document Text:\n{text}\n\n"
+                "Return JSON only."
+            ),
+        },
+    ]
+
+
+def _to_output(completion) -> SemanticAnalysisOutput:
     try: 
         logger.debug("semantic_analysis_response", extra={"response": completion.choices[0].message.content})
         content = completion.choices[0].message.content or "{}"
@@ -1,19 +1,283 @@
 # backend/services.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict
+import json
 import logging
+import os
+import time
 import dotenv
+from celery.exceptions import Retry
 from utils.logging_config import configure_logging
-from .technical import technical_analysis
-from .semantic import semantic_analysis
-from .psychometric import psychometric_analysis
-from .setup import get_llm_client, get_default_model
-from .utils import parse_json_block
+from .cache import cached_call, cached_call_async
+from .metrics import inc, observe
+from .technical import technical_analysis, technical_analysis_async, PROMPT_VERSION as TECHNICAL_PROMPT_VERSION
+from .semantic import semantic_analysis, semantic_analysis_async, PROMPT_VERSION as SEMANTIC_PROMPT_VERSION
+from .psychometric import (
+    psychometric_analysis,
+    psychometric_analysis_async,
+    PROMPT_VERSION as PSYCHOMETRIC_PROMPT_VERSION,
+)
+from .skills import taxonomy_version
+from .prescreen import prescreen_score, should_screen_out
+from .routing import route_models
+from .sections import stage_texts
+from .usage import AsyncUsageRecorder, UsageRecorder, summarize_usage
+from .fused import fused_analysis, fused_analysis_async, PROMPT_VERSION as FUSED_PROMPT_VERSION
+from .setup import get_llm_client, get_async_llm_client, get_default_model
+from .utils import error_kind, parse_json_block, retry_policy
 dotenv.load_dotenv()
 
 configure_logging()
 logger = logging.getLogger("backend.analysis")
 
 DEFAULT_TEMPERATURE = 0.2
+# Run technical/semantic/psychometric side by side; they only share the input text.
+CONCURRENT_STAGES = os.getenv("ANALYSIS_CONCURRENT_STAGES", "1") == "1"
+# Opt-in: ask for every stage plus summary/score in one completion.
+FUSED_MODE = os.getenv("ANALYSIS_FUSED_MODE", "0") == "1"
+SUMMARY_PROMPT_VERSION = 1
+SUMMARY_TEMPERATURE = 0.5
+
+FUSED_VERSION = f"{FUSED_PROMPT_VERSION}.{taxonomy_version()}"
+
+STAGE_FUNCTIONS = {
+    # skillMatch comes from the taxonomy, so its version is part of the cache key.
+    "technical": (technical_analysis, technical_analysis_async, f"{TECHNICAL_PROMPT_VERSION}.{taxonomy_version()}"),
+    "semantic": (semantic_analysis, semantic_analysis_async, SEMANTIC_PROMPT_VERSION),
+    "psychometric": (psychometric_analysis, psychometric_analysis_async, PSYCHOMETRIC_PROMPT_VERSION),
+}
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def _timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, _elapsed_ms(started)
+
+
+async def _timed_async(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = await fn(*args, **kwargs)
+    return result, _elapsed_ms(started)
+
+
+def _stage_ok(out) -> bool:
+    return isinstance(out, dict) and out.get("code", 200) == 200
+
+
+def _served_model(client):
+    return lambda: getattr(client, "served_model", None)
+
+
+def _cache_inputs(payload: dict) -> dict:
+    config = payload["modelConfig"]
+    return {
+        "text": payload.get("text", ""),
+        "model": config.get("model"),
+        "temperature": config.get("temperature"),
+        "jd_prompt": payload.get("jd_prompt"),
+        "served_model": _served_model(config.get("client")),
+    }
+
+
+def _cached_stage(stage: str, version: int | str, fn):
+    """Wrap a stage function so its successful outputs go through the LLM cache."""
+    def run(payload, task=None):
+        return cached_call(
+            stage,
+            lambda: fn(payload, task=task),
+            version=version,
+            cacheable=_stage_ok,
+            **_cache_inputs(payload),
+        )
+    return run
+
+
+def _cached_stage_async(stage: str, version: int | str, fn):
+    async def run(payload):
+        return await cached_call_async(
+            stage,
+            lambda: fn(payload),
+            version=version,
+            cacheable=_stage_ok,
+            **_cache_inputs(payload),
+        )
+    return run
+
+
+def _notify(on_stage, stage: str, data):
+    if on_stage is None:
+        return
+    try:
+        on_stage(stage, data)
+    except Exception:
+        logger.exception("on_stage_callback_failed", extra={"stage": stage})
+
+
+def _run_stages(stages: dict, task=None, concurrent: bool = True, on_stage=None) -> tuple[dict, dict]:
+    """Run ``{name: (fn, input)}`` stages and return ``(results, timings_ms)``.
+
+    ``on_stage(name, result)`` is called as each stage finishes.
+
+    Concurrent stages run without ``task``: Celery's request context is
+    thread-local, so ``task.retry()`` from a pool thread would re-raise the
+    original error instead of ``Retry``. Their errors are classified here,
+    in the task's thread, and rescheduled through ``retry_policy``.
+    """
+    results, timings = {}, {}
+    if not concurrent or len(stages) < 2:
+        for name, (fn, payload) in stages.items():
+            results[name], timings[name] = _timed(fn, payload, task=task)
+            _notify(on_stage, name, results[name])
+        return results, timings
+
+    with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="analysis-stage") as pool:
+        futures = {
+            pool.submit(_timed, fn, payload, task=None): name
+            for name, (fn, payload) in stages.items()
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name], timings[name] = future.result()
+            except Exception as exc:
+                kind = error_kind(exc)
+                if task is None or kind is None:
+                    raise
+                pool.shutdown(wait=False, cancel_futures=True)
+                retry_policy(task, exc, kind)  # raises celery.exceptions.Retry
+                raise
+            _notify(on_stage, name, results[name])
+    return results, timings
+
+
+async def _run_stages_async(stages: dict) -> tuple[dict, dict]:
+    names = list(stages)
+    outcomes = await asyncio.gather(
+        *(_timed_async(fn, payload) for fn, payload in stages.values())
+    )
+    results = {name: out for name, (out, _) in zip(names, outcomes)}
+    timings = {name: ms for name, (_, ms) in zip(names, outcomes)}
+    return results, timings
+
+
+def _model_configs(
+    client,
+    provider: str,
+    routing: dict,
+    temperature: float | None,
+    usage: dict,
+    asynchronous: bool = False,
+) -> dict:
+    """One modelConfig per stage, following the routing table.
+
+    Each stage's client records its token usage into ``usage``.
+    """
+    temperature = DEFAULT_TEMPERATURE if temperature is None else temperature
+    logger.debug(
+        "run_full_analysis",
+        extra={"provider": provider, "routing": routing, "temperature": temperature},
+    )
+    recorder = AsyncUsageRecorder if asynchronous else UsageRecorder
+    return {
+        stage: {"client": recorder(client, stage, usage), "model": route["model"], "temperature": temperature}
+        for stage, route in routing["stages"].items()
+    }
+
+
+def _route(provider: str, text: str, model: str | None) -> tuple[dict, dict]:
+    """Per-stage section texts and the routing table built on their lengths."""
+    texts, sectioning = stage_texts(text, STAGE_FUNCTIONS)
+    logger.debug("stage_sections", extra=sectioning)
+    routing = route_models(provider, text, model, default_model=get_default_model(provider), stage_texts=texts)
+    return texts, {**routing, "sections": sectioning}
+
+
+def _stage_inputs(texts: dict, model_configs: dict, threshold, criteria, jd_prompt) -> dict:
+    return {
+        "technical": {
+            "text": texts["technical"],
+            "modelConfig": model_configs["technical"],
+            "threshold": threshold,
+            "criteria": criteria,
+            "jd_prompt": jd_prompt,
+        },
+        "semantic": {"text": texts["semantic"], "modelConfig": model_configs["semantic"]},
+        "psychometric": {"text": texts["psychometric"], "modelConfig": model_configs["psychometric"]},
+    }
+
+
+def _fused_input(text: str, model_config: dict, criteria, jd_prompt) -> dict:
+    return {
+        "text": text,
+        "modelConfig": model_config,
+        "criteria": criteria,
+        "jd_prompt": jd_prompt,
+    }
+
+
+def _summary_cache_inputs(stage_results: dict, summary_config: dict) -> dict:
+    return {
+        "text": json.dumps(stage_results, sort_keys=True, default=str),
+        "model": summary_config["model"],
+        "served_model": _served_model(summary_config["client"]),
+        "temperature": SUMMARY_TEMPERATURE,
+        "version": SUMMARY_PROMPT_VERSION,
+        "cacheable": lambda out: out.get("status") == 200,
+    }
+
+
+def _final_result(res: dict, timings: dict, routing: dict, usage: dict) -> Dict:
+    usage = summarize_usage(usage)
+    logger.info("run_full_analysis_timings", extra={"timings_ms": timings, "total_tokens": usage["total_tokens"]})
+    if res["status"] != 200:
+        logger.debug("run_full_analysis", extra={"status": res["status"]})
+        return {
+            "summary": None,
+            "score": 0,
+            "status": 500,
+            "timings": timings,
+            "routing": routing,
+            "usage": usage,
+        }
+    return {
+        "summary": res["summary"],
+        "score": res["score"],
+        "timings": timings,
+        "routing": routing,
+        "usage": usage,
+    }
+
+
+def _record_metrics(timings: dict, stage_results: dict | None = None, summary: dict | None = None):
+    """Feed stage latencies and unparseable responses to /metrics."""
+    for stage, ms in timings.items():
+        observe("analysis_stage_seconds", ms / 1000, stage=stage)
+    for stage, out in (stage_results or {}).items():
+        if not _stage_ok(out):
+            inc("analysis_parse_failures_total", stage=stage)
+    if summary is not None and summary.get("status") != 200:
+        inc("analysis_parse_failures_total", stage="summary")
+
+
+def _screened_out(text: str, threshold, criteria, jd_prompt) -> Dict | None:
+    """Result for a clear keyword mismatch, or None when the LLM stages should run."""
+    prescreen = prescreen_score(text, jd_prompt=jd_prompt, criteria=criteria)
+    if not should_screen_out(prescreen, threshold):
+        return None
+    logger.info("prescreen_screened_out", extra={"threshold": threshold, **prescreen})
+    missing = ", ".join(prescreen["missing"][:5]) or "most job requirements"
+    return {
+        "summary": f"Screened out before analysis: keyword match {prescreen['score']}% vs threshold {threshold}%. Missing: {missing}.",
+        "score": prescreen["score"],
+        "screened_out": True,
+        "prescreen": prescreen,
+    }
+
 
 def run_full_analysis(
     text: str,
@@ -23,76 +287,127 @@ def run_full_analysis(
     criteria: dict | None = None,
     jd_prompt: str | None = None,
     task=None,
+    concurrent: bool | None = None,
+    fused: bool | None = None,
+    on_stage=None,
 ) -> Dict:
+    screened = _screened_out(text, threshold, criteria, jd_prompt)
+    if screened is not None:
+        _notify(on_stage, "summary", screened)
+        return screened
+
     client, provider = get_llm_client()
-    default_model = get_default_model(provider)
-    logger.debug(
-        "run_full_analysis",
-        extra={
-            "provider": provider,
-            "model": model or default_model,
-            "temperature": temperature if temperature is not None else DEFAULT_TEMPERATURE,
-            "text_length": len(text),
-            "criteria": criteria,
-            "jd_prompt": jd_prompt,
-        },
-    )
-    
-    model_config = {
-        "client": client,
-        "model": model or default_model,
-        "temperature": DEFAULT_TEMPERATURE if temperature is None else temperature,
-    }
-    logger.debug("model_config", extra=model_config)
+    texts, routing = _route(provider, text, model)
+    usage = {}
+    model_configs = _model_configs(client, provider, routing, temperature, usage)
+    logger.debug("run_full_analysis_input", extra={"text_length": len(text), "criteria": criteria, "jd_prompt": jd_prompt})
 
     try:
-        technical = technical_analysis(
+        started = time.perf_counter()
+        use_fused = FUSED_MODE if fused is None else fused
+        if use_fused:
+            combined, elapsed = _timed(
+                _cached_stage("fused", FUSED_VERSION, fused_analysis),
+                _fused_input(text, model_configs["fused"], criteria, jd_prompt),
+                task=task,
+            )
+            if combined is not None:
+                for name in STAGE_FUNCTIONS:
+                    _notify(on_stage, name, combined[name])
+                _notify(on_stage, "summary", {"summary": combined["summary"], "score": combined["score"], "status": 200})
+                timings = {"fused": elapsed, "total": _elapsed_ms(started)}
+                _record_metrics(timings)
+                return _final_result({**combined, "status": 200}, timings, routing, usage)
+            logger.warning("fused_analysis_fallback", extra={"elapsed_ms": elapsed})
+            _record_metrics({"fused": elapsed}, {"fused": combined})
+
+        inputs = _stage_inputs(texts, model_configs, threshold, criteria, jd_prompt)
+        stage_results, timings = _run_stages(
             {
-                "text": text,
-                "modelConfig": model_config,
-                "threshold": threshold,
-                "criteria": criteria,
-                "jd_prompt": jd_prompt,
+                name: (_cached_stage(name, version, fn), inputs[name])
+                for name, (fn, _, version) in STAGE_FUNCTIONS.items()
             },
             task=task,
+            concurrent=CONCURRENT_STAGES if concurrent is None else concurrent,
+            on_stage=on_stage,
         )
-        semantic = semantic_analysis(
-            {
-                "text": text, 
-                "modelConfig": model_config
-            }, 
-            task=task
+
+        summary_model = model_configs["summary"]["model"]
+        res, timings["summary"] = _timed(
+            cached_call,
+            "summary",
+            lambda: _generate_full_summary(summary=stage_results, client=model_configs["summary"]["client"], model=summary_model),
+            **_summary_cache_inputs(stage_results, model_configs["summary"]),
         )
-        psychometric = psychometric_analysis(
+        _notify(on_stage, "summary", res)
+        timings["total"] = _elapsed_ms(started)
+        _record_metrics(timings, stage_results, res)
+        return _final_result(res, timings, routing, usage)
+    except Retry:
+        # Let Celery reschedule; cached stages make the rerun cheap.
+        raise
+    except Exception as e:
+        logger.exception("full_analysis_failed")
+        return {
+            "summary": None,
+            "score": 0,
+            "status": 500
+        }
+
+
+async def run_full_analysis_async(
+    text: str,
+    model: str | None = None,
+    temperature: float | None = None,
+    threshold: int | None = None,
+    criteria: dict | None = None,
+    jd_prompt: str | None = None,
+    fused: bool | None = None,
+) -> Dict:
+    """Non-blocking twin of ``run_full_analysis`` for the FastAPI event loop."""
+    screened = _screened_out(text, threshold, criteria, jd_prompt)
+    if screened is not None:
+        return screened
+
+    client, provider = get_async_llm_client()
+    texts, routing = _route(provider, text, model)
+    usage = {}
+    model_configs = _model_configs(client, provider, routing, temperature, usage, asynchronous=True)
+
+    try:
+        started = time.perf_counter()
+        use_fused = FUSED_MODE if fused is None else fused
+        if use_fused:
+            combined, elapsed = await _timed_async(
+                _cached_stage_async("fused", FUSED_VERSION, fused_analysis_async),
+                _fused_input(text, model_configs["fused"], criteria, jd_prompt),
+            )
+            if combined is not None:
+                timings = {"fused": elapsed, "total": _elapsed_ms(started)}
+                await asyncio.to_thread(_record_metrics, timings)
+                return _final_result({**combined, "status": 200}, timings, routing, usage)
+            logger.warning("fused_analysis_fallback", extra={"elapsed_ms": elapsed})
+            await asyncio.to_thread(_record_metrics, {"fused": elapsed}, {"fused": combined})
+
+        inputs = _stage_inputs(texts, model_configs, threshold, criteria, jd_prompt)
+        stage_results, timings = await _run_stages_async(
             {
-                "text": text, 
-                "modelConfig": model_config
-            }, 
-            task=task
-        )
-        
-        res = _generate_full_summary(
-            summary={
-                "technical": technical,
-                "semantic": semantic,
-                "psychometric": psychometric
-            }, 
-            client=client, 
-            model=model or "whisper-large-v3"
+                name: (_cached_stage_async(name, version, fn), inputs[name])
+                for name, (_, fn, version) in STAGE_FUNCTIONS.items()
+            }
         )
 
-        if res["status"] != 200:
-            logger.debug("run_full_analysis", extra={"status": res["status"]})
-            return {
-                "summary": None,
-                "score": 0,
-                "status": 500
-            }
-        return {
-            "summary": res["summary"],
-            "score": res["score"],
-        }
-    except Exception as e:
+        summary_model = model_configs["summary"]["model"]
+        res, timings["summary"] = await _timed_async(
+            cached_call_async,
+            "summary",
+            lambda: _generate_full_summary_async(summary=stage_results, client=model_configs["summary"]["client"], model=summary_model),
+            **_summary_cache_inputs(stage_results, model_configs["summary"]),
+        )
+        timings["total"] = _elapsed_ms(started)
+        await asyncio.to_thread(_record_metrics, timings, stage_results, res)
+        return _final_result(res, timings, routing, usage)
+    except Exception:
         logger.exception("full_analysis_failed")
         return {
             "summary": None,
@@ -101,61 +416,88 @@ def run_full_analysis(
         }
 
 
+def _summary_messages(summary: dict) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are an expert resume analyst. "
+                """ Return JSON object with keys:
+                - summary: 3-4 line combined summary with technical semantic psychometric
+                - score: (0-100)
+                """
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                "Generate a concise overall summary on the following.\n\n"
+                f"Semantic: {summary.get('semantic')}\n\n"
+                f"Technical: {summary.get('technical')}\n\n"
+                f"Psychometric: {summary.get('psychometric')}\n"
+            ),
+        },
+    ]
+
+
+def _summary_result(completion) -> dict:
+    content = completion.choices[0].message.content or "{}"
+    parsed = parse_json_block(content) or {}
+    summary_text = parsed.get("summary")
+    score = parsed.get("score")
+
+    if summary_text is None or score is None:
+        raise ValueError("Invalid summary response from model.")
+
+    return {
+        "summary": summary_text,
+        "score": int(score),
+        "status": 200,
+    }
+
+
+def _summary_failure(exc: Exception) -> dict:
+    logger.exception("generate_full_summary_failed")
+    return {
+        "summary": None,
+        "score": None,
+        "status": 500,
+        "error": str(exc),
+    }
+
+
 def _generate_full_summary(
     summary: dict,
     client,
     model: str,
 ) -> dict:
     logger.debug("generate_full_summary", extra={
-        "semantic": summary["semantic"], 
-        "techincal": summary["technical"], 
+        "semantic": summary["semantic"],
+        "techincal": summary["technical"],
         "psychometric": summary["psychometric"]
     })
     try:
         completion = client.chat.completions.create(
             model=model,
-            temperature=0.5,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an expert resume analyst. "
-                        """ Return JSON object with keys:
-                        - summary: 3-4 line combined summary with technical semantic psychometric
-                        - score: (0-100)
-                        """
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Generate a concise overall summary on the following.\n\n"
-                        f"Semantic: {summary.get('semantic')}\n\n"
-                        f"Technical: {summary.get('technical')}\n\n"
-                        f"Psychometric: {summary.get('psychometric')}\n"
-                    ),
-                },
-            ],
+            temperature=SUMMARY_TEMPERATURE,
+            messages=_summary_messages(summary),
         )
-        content = completion.choices[0].message.content or "{}"
-        parsed = parse_json_block(content) or {}
-        summary_text = parsed.get("summary")
-        score = parsed.get("score")
+        return _summary_result(completion)
+    except Exception as exc:
+        return _summary_failure(exc)
 
-        print(summary, score)
-        if summary_text is None or score is None:
-            raise ValueError("Invalid summary response from model.")
 
-        return {
-            "summary": summary_text,
-            "score": int(score),
-            "status": 200,
-        }
+async def _generate_full_summary_async(
+    summary: dict,
+    client,
+    model: str,
+) -> dict:
+    try:
+        completion = await client.chat.completions.create(
+            model=model,
+            temperature=SUMMARY_TEMPERATURE,
+            messages=_summary_messages(summary),
+        )
+        return _summary_result(completion)
     except Exception as exc:
-        logger.exception("generate_full_summary_failed")
-        return {
-            "summary": None,
-            "score": None,
-            "status": 500,
-            "error": str(exc),
-        }
+        return _summary_failure(exc)
@@ -1,20 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
+import threading
 from types import SimpleNamespace
 
-from groq import Groq
+import httpx
+from groq import AsyncGroq, Groq
+
+from analysis.ratelimit import RATE_LIMIT_ENABLED, AsyncRateLimitedClient, RateLimitedClient
+from analysis.router import HEDGING_ENABLED, AsyncProviderRouter, ProviderRouter
 
 try:
     import google.generativeai as genai
 except Exception:
     genai = None
 
+logger = logging.getLogger("backend.analysis.setup")
+
 DEFAULT_MODELS = {
     "groq": "llama-3.1-8b-instant",
     "gemini": "gemini-2.5-flash",
 }
 
+# Keep-alive pool for the Groq HTTP client (one pool per process).
+GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "20"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", "10"))
+GROQ_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_KEEPALIVE_EXPIRY", "60"))
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+# The async client serves the API's event loop, which keeps hundreds of calls
+# in flight, so it gets its own, larger pool.
+GROQ_ASYNC_MAX_CONNECTIONS = int(os.getenv("GROQ_ASYNC_MAX_CONNECTIONS", "200"))
+GROQ_ASYNC_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("GROQ_ASYNC_MAX_KEEPALIVE_CONNECTIONS", "50"))
+# Seconds a request may wait for a free pooled connection (separate from GROQ_TIMEOUT).
+GROQ_POOL_TIMEOUT = float(os.getenv("GROQ_POOL_TIMEOUT", "30"))
+# Point at a compatible endpoint, e.g. the simulated provider in bench/simulated_llm.py.
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+
 def _combine_messages(messages: list[dict]) -> str:
     parts = []
     for msg in messages or []:
@@ -24,35 +47,194 @@ def _combine_messages(messages: list[dict]) -> str:
     return "\n\n".join(parts).strip()
 
 
+def _as_completion(response, model: str):
+    metadata = getattr(response, "usage_metadata", None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=getattr(response, "text", None) or ""))],
+        usage=SimpleNamespace(
+            prompt_tokens=getattr(metadata, "prompt_token_count", 0) or 0,
+            completion_tokens=getattr(metadata, "candidates_token_count", 0) or 0,
+        ),
+        model=model,
+    )
+
+
 class _GeminiClientShim:
     def __init__(self, genai_module):
         self._genai = genai_module
+        self._models = {}
+        self._models_lock = threading.Lock()
         self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
 
+    def _model(self, name: str):
+        model_obj = self._models.get(name)
+        if model_obj is None:
+            with self._models_lock:
+                model_obj = self._models.get(name)
+                if model_obj is None:
+                    model_obj = self._genai.GenerativeModel(name)
+                    self._models[name] = model_obj
+        return model_obj
+
     def _create(self, model: str, temperature: float | None, messages: list[dict]):
         prompt = _combine_messages(messages)
         generation_config = {"temperature": temperature} if temperature is not None else None
-        model_obj = self._genai.GenerativeModel(model)
+        model_obj = self._model(model)
         response = model_obj.generate_content(prompt, generation_config=generation_config)
-        content = getattr(response, "text", None)
-        return SimpleNamespace(
-            choices=[SimpleNamespace(message=SimpleNamespace(content=content or ""))]
-        )
+        return _as_completion(response, model)
 
 
-def get_llm_client():
-    groq_key = os.environ.get("GROQ_API_KEY")
-    gemini_key = os.environ.get("GEMINI_API_KEY")
+class _GeminiAsyncClientShim(_GeminiClientShim):
+    """Awaitable ``chat.completions.create`` on top of the Gemini SDK."""
+
+    def __init__(self, genai_module):
+        super().__init__(genai_module)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_async))
+
+    async def _create_async(self, model: str, temperature: float | None, messages: list[dict]):
+        prompt = _combine_messages(messages)
+        generation_config = {"temperature": temperature} if temperature is not None else None
+        model_obj = self._model(model)
+        generate_async = getattr(model_obj, "generate_content_async", None)
+        if generate_async is not None:
+            response = await generate_async(prompt, generation_config=generation_config)
+        else:
+            response = await asyncio.to_thread(
+                model_obj.generate_content, prompt, generation_config=generation_config
+            )
+        return _as_completion(response, model)
+
+
+# -------- Client registry --------
+# Clients are built once per process and reused across runs so HTTP connections
+# (and their TLS sessions) stay warm. The registry is dropped in forked children
+# (Celery prefork) because sockets must not be shared across processes.
+_clients: dict[str, object] = {}
+_clients_lock = threading.Lock()
+_clients_pid = os.getpid()
+
+
+def _reset_clients():
+    global _clients_lock, _clients_pid
+    _clients.clear()
+    _clients_lock = threading.Lock()
+    _clients_pid = os.getpid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_clients)
 
-    if groq_key:
-        return Groq(api_key=groq_key), "groq"
-    if gemini_key:
+
+def _build_client(provider: str, asynchronous: bool = False):
+    if provider == "groq":
+        limits = httpx.Limits(
+            max_connections=GROQ_ASYNC_MAX_CONNECTIONS if asynchronous else GROQ_MAX_CONNECTIONS,
+            max_keepalive_connections=(
+                GROQ_ASYNC_MAX_KEEPALIVE_CONNECTIONS if asynchronous else GROQ_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            keepalive_expiry=GROQ_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(GROQ_TIMEOUT, pool=GROQ_POOL_TIMEOUT)
+        # The SDK retries 429s with its own backoff by default; with the shared
+        # limiter on, RateLimitedClient owns every retry so AIMD and
+        # Retry-After see each throttle.
+        options = {"api_key": os.environ["GROQ_API_KEY"], "base_url": GROQ_BASE_URL}
+        if RATE_LIMIT_ENABLED:
+            options["max_retries"] = 0
+        if asynchronous:
+            http_client = httpx.AsyncClient(timeout=timeout, limits=limits)
+            return AsyncGroq(http_client=http_client, **options)
+        http_client = httpx.Client(timeout=timeout, limits=limits)
+        return Groq(http_client=http_client, **options)
+    if provider == "gemini":
         if genai is None:
             raise RuntimeError("Gemini client not installed. Install google-generativeai.")
-        genai.configure(api_key=gemini_key)
-        return _GeminiClientShim(genai), "gemini"
+        # The Gemini SDK owns its transport: a gRPC channel per process that
+        # multiplexes calls over one HTTP/2 connection, so there is no pool to size.
+        genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+        if asynchronous:
+            return _GeminiAsyncClientShim(genai)
+        return _GeminiClientShim(genai)
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def configured_providers() -> list[str]:
+    providers = []
+    if os.environ.get("GROQ_API_KEY"):
+        providers.append("groq")
+    if os.environ.get("GEMINI_API_KEY"):
+        providers.append("gemini")
+    return providers
+
+
+def get_client(provider: str, asynchronous: bool = False):
+    if _clients_pid != os.getpid():
+        _reset_clients()
+    key = f"{provider}:async" if asynchronous else provider
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _build_client(provider, asynchronous=asynchronous)
+                if RATE_LIMIT_ENABLED:
+                    wrapper = AsyncRateLimitedClient if asynchronous else RateLimitedClient
+                    client = wrapper(client, provider)
+                _clients[key] = client
+                logger.info("llm_client_created", extra={"provider": key, "pid": os.getpid()})
+    return client
+
+
+def get_async_client(provider: str):
+    return get_client(provider, asynchronous=True)
+
+
+def _get_router(asynchronous: bool = False):
+    """Hedging/failover router over every configured provider, or None if only one is set."""
+    providers = configured_providers()
+    if not HEDGING_ENABLED or len(providers) < 2:
+        return None
+    if _clients_pid != os.getpid():
+        _reset_clients()
+    key = "router:async" if asynchronous else "router"
+    router = _clients.get(key)
+    if router is None:
+        # Built outside the lock: get_client takes it for each provider.
+        clients = {provider: get_client(provider, asynchronous=asynchronous) for provider in providers}
+        router_cls = AsyncProviderRouter if asynchronous else ProviderRouter
+        with _clients_lock:
+            router = _clients.setdefault(key, router_cls(clients, providers, DEFAULT_MODELS))
+    return router
+
+
+def init_llm_clients(asynchronous: bool = False):
+    """Warm every configured provider; call once per API / worker process."""
+    for provider in configured_providers():
+        try:
+            get_client(provider, asynchronous=asynchronous)
+        except Exception:
+            logger.exception("llm_client_init_failed", extra={"provider": provider})
+    try:
+        _get_router(asynchronous=asynchronous)
+    except Exception:
+        logger.exception("llm_router_init_failed")
+
+
+def _primary_provider() -> str:
+    providers = configured_providers()
+    if not providers:
+        raise RuntimeError("Set GROQ_API_KEY or GEMINI_API_KEY in the environment.")
+    return providers[0]
+
+
+def get_llm_client():
+    provider = _primary_provider()
+    return _get_router() or get_client(provider), provider
+
 
-    raise RuntimeError("Set GROQ_API_KEY or GEMINI_API_KEY in the environment.")
+def get_async_llm_client():
+    provider = _primary_provider()
+    return _get_router(asynchronous=True) or get_async_client(provider), provider
 
 
 def get_default_model(provider: str) -> str:
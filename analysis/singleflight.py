@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+
+from analysis.store import r
+
+logger = logging.getLogger("backend.analysis.singleflight")
+
+# Identical submissions (same content + parameters) attach to the run already
+# in flight instead of starting a new one.
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "1") == "1"
+SINGLE_FLIGHT_TTL = int(os.getenv("SINGLE_FLIGHT_TTL", "600"))  # how long a pointer stays attachable
+SINGLE_FLIGHT_LOCK_TTL = 30  # owner must publish its task_id within this window
+SINGLE_FLIGHT_WAIT = 2.0  # seconds a follower waits for the owner's task_id
+
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def fingerprint(content: bytes | str, params: dict) -> str:
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return fingerprint_digest(hashlib.sha256(content), params)
+
+
+def fingerprint_digest(content_digest, params: dict) -> str:
+    """``fingerprint`` for content already fed to a running sha256 (streamed uploads)."""
+    digest = content_digest.copy()
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _key(fp: str) -> str:
+    return f"inflight:{fp}"
+
+
+def _try_lock(fp: str) -> bool:
+    return bool(r.set(_key(fp), json.dumps({"pending": True}), nx=True, ex=SINGLE_FLIGHT_LOCK_TTL))
+
+
+def _load_pointer(fp: str) -> dict | None:
+    raw = r.get(_key(fp))
+    return json.loads(raw) if raw else None
+
+
+async def join_or_lock(fp: str, is_alive=None) -> dict | None:
+    """Pointer of an identical in-flight run, or None once the caller owns the lock.
+
+    The owner must then call ``publish`` (or ``release`` if it failed to start).
+    ``is_alive(task_id)`` lets the caller drop pointers to failed runs; it and
+    the Redis calls run in a worker thread, off the event loop.
+    """
+    deadline = time.monotonic() + SINGLE_FLIGHT_WAIT
+    while True:
+        if await asyncio.to_thread(_try_lock, fp):
+            return None
+        pointer = await asyncio.to_thread(_load_pointer, fp)
+        if pointer and pointer.get("task_id"):
+            if is_alive is None or await asyncio.to_thread(is_alive, pointer["task_id"]):
+                logger.info("single_flight_joined", extra={"task_id": pointer["task_id"]})
+                return pointer
+            await asyncio.to_thread(release, fp)
+            continue
+        if time.monotonic() >= deadline:
+            # The owner stalled before enqueueing; run uncoalesced rather than block.
+            logger.warning("single_flight_wait_expired")
+            return None
+        await asyncio.sleep(0.05)
+
+
+def publish(fp: str, pointer: dict):
+    r.setex(_key(fp), SINGLE_FLIGHT_TTL, json.dumps(pointer))
+
+
+def release(fp: str):
+    r.delete(_key(fp))
+
+
+async def coalesce(fp: str, factory):
+    """Await ``factory()`` once per fingerprint within this process."""
+    task = _inflight.get(fp)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        _inflight[fp] = task
+        task.add_done_callback(lambda _: _inflight.pop(fp, None))
+    else:
+        logger.info("single_flight_coalesced")
+    # A caller that disconnects must not cancel the run for the others.
+    return await asyncio.shield(task)
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import re
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
+
+logger = logging.getLogger("backend.analysis.skills")
+
+TAXONOMY_PATH = Path(os.getenv("SKILL_TAXONOMY_PATH", Path(__file__).resolve().parent / "data" / "skills.json"))
+
+
+class _Automaton:
+    """Pure-Python Aho-Corasick, used when pyahocorasick is not installed."""
+
+    def __init__(self, patterns: dict[str, tuple]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, str]]] = [[]]
+        for pattern, value in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(value)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter(self, text: str):
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for value in out[state]:
+                yield end, value
+
+
+@lru_cache(maxsize=1)
+def load_taxonomy() -> dict:
+    with open(TAXONOMY_PATH, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _build(patterns: dict[str, tuple]):
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for alias, value in patterns.items():
+            automaton.add_word(alias, value)
+        automaton.make_automaton()
+        return automaton
+    # Several times slower; pyahocorasick is in requirements.txt, so this is
+    # for dev setups without it.
+    logger.warning("skills_pure_python_automaton")
+    return _Automaton(patterns)
+
+
+@lru_cache(maxsize=1)
+def _automata():
+    """``(case-insensitive, exact-case)`` automata.
+
+    Aliases that are also ordinary English ("go", "spring", "excel at",
+    "r&d") are listed under ``exact_case`` in the taxonomy and only match
+    with that exact spelling, so "Go" and "Spring" count but "go" does not.
+    Those also under ``needs_context`` are flagged: capitalised English
+    words ("American Express", "Spring 2020") still need a neighbouring
+    skill to count.
+    """
+    taxonomy = load_taxonomy()
+    exact = {term.lower(): term for term in taxonomy.get("exact_case", [])}
+    needs_context = set(taxonomy.get("needs_context", []))
+    patterns, exact_patterns = {}, {}
+    for canonical, aliases in taxonomy["skills"].items():
+        for alias in {canonical.lower(), *(a.lower() for a in aliases)}:
+            if alias in exact:
+                exact_patterns[exact[alias]] = (len(alias), canonical, exact[alias] in needs_context)
+            else:
+                patterns[alias] = (len(alias), canonical, False)
+    return _build(patterns), _build(exact_patterns) if exact_patterns else None
+
+
+def taxonomy_version() -> int:
+    return load_taxonomy().get("version", 1)
+
+
+def _is_boundary(text: str, index: int, strict: bool = False) -> bool:
+    if index < 0 or index >= len(text):
+        return True
+    # Exact-case terms also refuse joiners: "R&D", "Go-to", "Spark's".
+    return not text[index].isalnum() and not (strict and text[index] in "&-'\u2019")
+
+
+def _spans(automaton, haystack: str, strict: bool) -> list[tuple[int, int, str, bool]]:
+    spans = []
+    for end, (length, canonical, needs_context) in automaton.iter(haystack):
+        start = end - length + 1
+        if _is_boundary(haystack, start - 1, strict) and _is_boundary(haystack, end + 1, strict):
+            spans.append((start, end + 1, canonical, needs_context))
+    return spans
+
+
+# What may sit between two skills in a list: "Go, Rust", "Go / Rust", "Go and Rust".
+_LIST_GAP_RE = re.compile(r"\s*(?:[,;/|+&\u00b7\u2022]|and|or)?\s*")
+
+
+def _adjacent(text: str, left: tuple, right: tuple) -> bool:
+    return _LIST_GAP_RE.fullmatch(text, left[1], right[0]) is not None
+
+
+def extract_skills(text: str) -> list[dict]:
+    """Match taxonomy skills in one pass over ``text``.
+
+    Returns ``[{"skill", "count", "offsets"}]`` ordered by count, where
+    offsets are ``(start, end)`` character spans into ``text``.
+    """
+    text = text or ""
+    if not text:
+        return []
+
+    # lower() keeps offsets aligned for the Latin text resumes are written in.
+    automaton, exact_automaton = _automata()
+    spans = _spans(automaton, text.lower(), strict=False)
+    if exact_automaton is not None:
+        spans += _spans(exact_automaton, text, strict=True)
+
+    # Keep the longest match where aliases overlap ("react native" over "react").
+    spans.sort(key=lambda span: (span[0], -(span[1] - span[0])))
+    kept, covered_until = [], -1
+    for span in spans:
+        if span[0] < covered_until:
+            continue
+        covered_until = span[1]
+        kept.append(span)
+
+    found: dict[str, list[tuple[int, int]]] = {}
+    for i, (start, stop, canonical, needs_context) in enumerate(kept):
+        if needs_context and not (
+            (i > 0 and _adjacent(text, kept[i - 1], kept[i]))
+            or (i + 1 < len(kept) and _adjacent(text, kept[i], kept[i + 1]))
+        ):
+            continue
+        found.setdefault(canonical, []).append((start, stop))
+
+    skills = [
+        {"skill": skill, "count": len(offsets), "offsets": offsets}
+        for skill, offsets in found.items()
+    ]
+    skills.sort(key=lambda item: (-item["count"], item["offsets"][0][0]))
+    return skills
+
+
+def match_skills(text: str) -> str:
+    """Comma-separated canonical skills found in ``text``; the ``skillMatch`` value."""
+    return ", ".join(item["skill"] for item in extract_skills(text))
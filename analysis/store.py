@@ -1,8 +1,11 @@
+import hashlib
 import json
+import zlib
 import redis
 from typing import Any
 import os
 import dotenv
+from analysis.metrics import timed
 dotenv.load_dotenv()
 
 REDIS_URL = (
@@ -14,15 +17,42 @@ REDIS_URL = (
     
 r = redis.Redis.from_url(f"{REDIS_URL}/2")
 DEFAULT_TTL = 3600  # 1 hour
+# Extraction results keyed by PDF content outlive any single upload.
+EXTRACTION_CACHE_ENABLED = os.getenv("EXTRACTION_CACHE_ENABLED", "1") == "1"
+EXTRACTION_CACHE_TTL = int(os.getenv("EXTRACTION_CACHE_TTL", str(30 * 24 * 3600)))  # 30 days
 
 def _key(file_id: str, name: str, version: int = 1) -> str:
     return f"resume:{file_id}:{name}:v{version}"
 
+def _content_key(digest: str, name: str, version: int = 1) -> str:
+    return f"pdf:{digest}:{name}:v{version}"
+
+
+def pdf_digest(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
 # -------- PDF --------
+@timed("redis_op_seconds", op="store_pdf")
 def store_pdf(file_id: str, pdf_bytes: bytes, ttl: int = DEFAULT_TTL):
     r.setex(_key(file_id, "cv_pdf"), ttl, pdf_bytes)
 
 
+# Not timed: it runs once per upload chunk and observe() would add a metrics
+# round-trip to each; ingest_pdf records the upload's total as op="append_pdf".
+def append_pdf_chunk(file_id: str, chunk: bytes, ttl: int = DEFAULT_TTL):
+    """Grow the PDF blob by one upload chunk (APPEND creates it on the first call)."""
+    pipe = r.pipeline(transaction=False)
+    pipe.append(_key(file_id, "cv_pdf"), chunk)
+    pipe.expire(_key(file_id, "cv_pdf"), ttl)
+    pipe.execute()
+
+
+@timed("redis_op_seconds", op="delete_pdf")
+def delete_pdf(file_id: str):
+    r.delete(_key(file_id, "cv_pdf"))
+
+
+@timed("redis_op_seconds", op="load_pdf")
 def load_pdf(file_id: str) -> bytes:
     data = r.get(_key(file_id, "cv_pdf"))
     if not data:
@@ -31,10 +61,12 @@ def load_pdf(file_id: str) -> bytes:
 
 
 # -------- Extracted Text --------
+@timed("redis_op_seconds", op="store_extracted_text")
 def store_extracted_text(file_id: str, text: str, ttl: int = DEFAULT_TTL):
     r.setex(_key(file_id, "text"), ttl, text)
 
 
+@timed("redis_op_seconds", op="load_extracted_text")
 def load_extracted_text(file_id: str) -> str:
     data = r.get(_key(file_id, "text"))
     if not data:
@@ -46,11 +78,56 @@ def load_extracted_text(file_id: str) -> str:
     return data
 
 
+@timed("redis_op_seconds", op="load_extracted_texts")
+def load_extracted_texts(file_ids: list[str]) -> dict[str, str]:
+    """Batch load with one MGET; missing or expired ids are left out."""
+    if not file_ids:
+        return {}
+    values = r.mget([_key(file_id, "text") for file_id in file_ids])
+    return {
+        file_id: data.decode("utf-8") if isinstance(data, bytes) else data
+        for file_id, data in zip(file_ids, values)
+        if data
+    }
+
+
+# -------- Extraction cache (by PDF content) --------
+@timed("redis_op_seconds", op="store_cached_extraction")
+def store_cached_extraction(digest: str, variant: str, data: dict, ttl: int = EXTRACTION_CACHE_TTL):
+    r.setex(_content_key(digest, f"extraction:{variant}"), ttl, json.dumps(data))
+
+
+@timed("redis_op_seconds", op="load_cached_extraction")
+def load_cached_extraction(digest: str, variant: str) -> dict | None:
+    """Cached extraction for this PDF, or None on a miss (never raises KeyError)."""
+    if not EXTRACTION_CACHE_ENABLED:
+        return None
+    data = r.get(_content_key(digest, f"extraction:{variant}"))
+    return json.loads(data) if data else None
+
+
+# -------- Parsed documents (by PDF content) --------
+# zlib-compressed compact JSON: the box list dominates and compresses ~5x.
+@timed("redis_op_seconds", op="store_document")
+def store_document(digest: str, document: dict, ttl: int = EXTRACTION_CACHE_TTL):
+    payload = zlib.compress(json.dumps(document, separators=(",", ":")).encode("utf-8"))
+    r.setex(_content_key(digest, f"document:{document['variant']}"), ttl, payload)
+
+
+@timed("redis_op_seconds", op="load_document")
+def load_document(digest: str, variant: str) -> dict | None:
+    """Parsed document for this PDF, or None on a miss (never raises KeyError)."""
+    data = r.get(_content_key(digest, f"document:{variant}"))
+    return json.loads(zlib.decompress(data)) if data else None
+
+
 # -------- Analysis Results --------
+@timed("redis_op_seconds", op="store_analysis")
 def store_analysis(file_id: str, name: str, data: Any, ttl: int = DEFAULT_TTL):
     r.setex(_key(file_id, f"analysis:{name}"), ttl, json.dumps(data))
 
 
+@timed("redis_op_seconds", op="load_analysis")
 def load_analysis(file_id: str, name: str) -> Any:
     data = r.get(_key(file_id, f"analysis:{name}"))
     if not data:
@@ -58,10 +135,12 @@ def load_analysis(file_id: str, name: str) -> Any:
     return json.loads(data)
 
 # -------- Final Report --------
+@timed("redis_op_seconds", op="store_final_report")
 def store_final_report(file_id: str, report: dict, ttl: int = DEFAULT_TTL):
     r.setex(_key(file_id, "final"), ttl, json.dumps(report))
 
 
+@timed("redis_op_seconds", op="load_final_report")
 def load_final_report(file_id: str) -> dict:
     data = r.get(_key(file_id, "final"))
     if not data:
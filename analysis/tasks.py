@@ -2,13 +2,46 @@ import base64
 import json
 import logging
 import os
-from analysis.store import load_pdf, store_extracted_text, load_extracted_text, store_analysis, load_analysis
+import time
+from celery.exceptions import Retry
+from celery.signals import before_task_publish, task_prerun, worker_process_init
+from analysis.store import (
+    load_pdf, store_extracted_text, load_extracted_text, store_analysis, load_analysis,
+    pdf_digest, load_cached_extraction, store_cached_extraction, load_document, store_document,
+)
 from backend.celery_app import celery_app
 from .services import run_full_analysis
-from .pdf_utils import pdf_bytes_to_text
+from utils.document import document_variant, parse_document
+from .compaction import TOKEN_BUDGET, compact_text
+from .events import publish_event
+from .metrics import inc, observe, timed
+from .setup import init_llm_clients
 
 logger = logging.getLogger("backend.analysis.tasks")
 
+
+@worker_process_init.connect
+def _init_worker_clients(**kwargs):
+    # Runs in each prefork child after fork, so every process owns its own pool.
+    init_llm_clients()
+
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **kwargs):
+    # Custom message headers surface on task.request, which gives queue wait.
+    if headers is not None:
+        headers.setdefault("published_at", time.time())
+
+
+@task_prerun.connect
+def _observe_queue_wait(task=None, **kwargs):
+    published_at = getattr(task.request, "published_at", None) if task is not None else None
+    if published_at:
+        queue = (task.request.delivery_info or {}).get("routing_key") or "unknown"
+        observe("analysis_queue_wait_seconds", max(0.0, time.time() - published_at), queue=queue, task=task.name)
+
+
+@timed("analysis_stage_seconds", stage="sqlite_log")
 def _log_async_run(*, file_name: str | None, ai_model: str | None, temperature: float | None,
                    threshold: int | None, document_length: int, result: dict):
     try:
@@ -26,6 +59,7 @@ def _log_async_run(*, file_name: str | None, ai_model: str | None, temperature:
             has_pdf=True,
             document_length=document_length,
             result_json=json.dumps(result),
+            **AnalysisRun.usage_fields(result),
         )
     except Exception:
         logger.exception("async_run_log_failed")
@@ -40,18 +74,52 @@ def extract_text_task(self, file_id: str, file_name: str | None = None):
         )
 
         file_bytes = load_pdf(file_id)
-        text = (pdf_bytes_to_text(file_bytes) or "").strip()
+        digest = pdf_digest(file_bytes)
+        # the cached text depends on the extraction and compaction budgets too
+        variant = f"{document_variant()}:{TOKEN_BUDGET}"
+        cached = load_cached_extraction(digest, variant)
+        inc("extraction_cache_total", result="hit" if cached else "miss")
+        if cached:
+            logger.info("extraction_cache_hit", extra={"file_id": file_id, "digest": digest})
+            store_extracted_text(file_id, cached["text"])
+            payload = {
+                "compaction": cached["compaction"],
+                "extraction": {**cached["extraction"], "cached": True},
+                "fields": cached.get("fields"),
+            }
+            publish_event(file_id, "extracted", {"file_name": file_name, **payload})
+            return {"file_id": file_id, "file_name": file_name, **payload}
+
+        # the UI may already have parsed this exact PDF
+        document = load_document(digest, document_variant())
+        if document is None:
+            document = parse_document(file_bytes)
+            store_document(digest, document)
+            observe("analysis_stage_seconds", document["stats"]["total_ms"] / 1000, stage="extraction")
+        extraction, fields = document["stats"], document["fields"]
+        logger.info("pdf_text_extracted", extra={
+            "file_id": file_id,
+            **{k: extraction[k] for k in ("pages", "total_pages", "truncated", "mode", "workers", "total_ms")},
+        })
+        text = (document["text"] or "").strip()
         if not text:
             raise ValueError("No extractable text found in PDF.")
-        # store the extracted text
+        # store the compacted text so every downstream stage prompts with it
+        text, compaction = compact_text(text)
+        logger.info("extracted_text_compacted", extra={"file_id": file_id, **compaction})
         store_extracted_text(file_id, text)
-        return {"file_id": file_id, "file_name": file_name}
+        payload = {"compaction": compaction, "extraction": extraction, "fields": fields}
+        store_cached_extraction(digest, variant, {"text": text, **payload})
+        publish_event(file_id, "extracted", {"file_name": file_name, **payload})
+        return {"file_id": file_id, "file_name": file_name, **payload}
     
-    except Exception:
+    except Exception as exc:
         logger.exception("extract_pdf_text_failed", extra={"file_id": file_id})
+        publish_event(file_id, "failed", {"stage": "extracting", "error": str(exc)})
         raise
 
-@celery_app.task(name="analysis.tasks.analyze_resume_task", bind=True, rate_limit="5/m")
+# Provider throughput is governed by the shared limiter in analysis.ratelimit.
+@celery_app.task(name="analysis.tasks.analyze_resume_task", bind=True)
 def analyze_resume_task(
     self,
     previous: dict,
@@ -60,6 +128,7 @@ def analyze_resume_task(
     threshold: int | None = None,
     criteria: dict | None = None,
     jd_prompt: str | None = None,
+    fused: bool | None = None,
 ):
     try:
         self.update_state(
@@ -76,7 +145,9 @@ def analyze_resume_task(
             threshold=threshold,
             criteria=criteria,
             jd_prompt=jd_prompt,
+            fused=fused,
             task=self,
+            on_stage=lambda stage, data: publish_event(file_id, stage, data),
         )
         store_analysis(file_id, "full", result)
         return {
@@ -85,9 +156,13 @@ def analyze_resume_task(
             "ai_model": ai_model,
             "temperature": temperature,
             "threshold": threshold,
+            "compaction": previous.get("compaction"),
         }
-    except Exception:
+    except Retry:
+        raise
+    except Exception as exc:
         logger.exception("analysis_task_failed")
+        publish_event(previous["file_id"], "failed", {"stage": "analysis", "error": str(exc)})
         raise
 
 @celery_app.task(name="analysis.tasks.reporting_task", bind=True, rate_limit="2/m")
@@ -107,6 +182,11 @@ def reporting_task(
             "file_id": file_id,
             "summary": result["summary"],
             "score": result["score"],
+            "timings": result.get("timings"),
+            "routing": result.get("routing"),
+            "usage": result.get("usage"),
+            "screened_out": result.get("screened_out", False),
+            "compaction": previous.get("compaction"),
         }
         try:
             text = load_extracted_text(file_id)
@@ -121,7 +201,9 @@ def reporting_task(
             document_length=doc_len,
             result=report,
         )
+        publish_event(file_id, "done", report)
         return report 
     except Exception as e:
-        logger.exception("reporting_task_failed", extra={"file_id": file_id})
+        logger.exception("reporting_task_failed", extra={"file_id": previous.get("file_id")})
+        publish_event(previous["file_id"], "failed", {"stage": "reporting", "error": str(e)})
         raise 
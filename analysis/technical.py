@@ -3,8 +3,13 @@ from typing import Optional
 from analysis.types import TechnicalAnalysisInput, TechnicalAnalysisOutput
 import logging
 from analysis.utils import _coerce_to_str, parse_json_block, retry_policy
+from analysis.skills import match_skills
+from analysis.ratelimit import RateLimited
 from groq import RateLimitError
 logger = logging.getLogger("backend.analysis.technical")
+# Bump when the prompt below changes so cached outputs are not reused.
+PROMPT_VERSION = 2
+
 
 def technical_analysis(
     input: TechnicalAnalysisInput,
@@ -20,6 +25,8 @@ def technical_analysis(
     # criteria = input.get("criteria") or {}
     jd_prompt = input.get("jd_prompt")
     text = input.get("text", "")
+    # Skills come from the local taxonomy matcher, not the model.
+    skill_match = match_skills(text)
 
     # log the model configuration being used
     logger.debug("technical_analysis_model_config", extra={"model": model, "temperature": temperature, "threshold": threshold})
@@ -28,44 +35,69 @@ def technical_analysis(
         completion = client.chat.completions.create(
             model=model,
             temperature=temperature,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an EXPERT in analysing technical details from text."
-
-                        """RETURN FORMAT: JSON
-                        - technicalSummary: A 2 line summary technical details.
-                        - skillMatch: MAX 3 of the skills mentioned in the document with .
-                        - experienceLevel: An overall true experience level classification (Junior, Mid, Senior, Manager, CTO, COO).
-                        - overallScore: A score representing the overall technical fit. (0-100)"""
-                        "Evaluation Criteria (optional):\n"
-                        f"- Job Description: {jd_prompt}\n\n"
-                    ),
-                },
-                {
-                    "role": "user",
-                    "content": (
-                        "Analyze the following text to understand its "
-                        "technical details, identify mentioned skills, determine overall experience level"
-                        "and calculate the overall technical score.\n\n"
-                        f"Document Text:\n{text}\n\n"
-                        "Return JSON only."
-                    ),
-                },
-            ],
+            messages=_build_messages(text, jd_prompt, skill_match),
         )
-    except RateLimitError as exc:
+    except (RateLimitError, RateLimited) as exc:
         if task is not None:
             return retry_policy(task, exc, "rate_limit")
         raise
 
-     # log response 
+    return _to_output(completion, skill_match)
+
+
+async def technical_analysis_async(
+    input: TechnicalAnalysisInput,
+) -> TechnicalAnalysisOutput:
+    logger.debug("technical_analysis_async_request", extra={"input": input})
+
+    model_config = input.get("modelConfig", {})
+    client = model_config["client"]
+    text = input.get("text", "")
+    skill_match = match_skills(text)
+    completion = await client.chat.completions.create(
+        model=model_config.get("model", "llama-3.1-8b-instant"),
+        temperature=model_config.get("temperature", 0.2),
+        messages=_build_messages(text, input.get("jd_prompt"), skill_match),
+    )
+    return _to_output(completion, skill_match)
+
+
+def _build_messages(text: str, jd_prompt: str | None, skill_match: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": (
+                "You are an EXPERT in analysing technical details from text."
+
+                """RETURN FORMAT: JSON
+                - technicalSummary: A 2 line summary technical details.
+                - experienceLevel: An overall true experience level classification (Junior, Mid, Senior, Manager, CTO, COO).
+                - overallScore: A score representing the overall technical fit. (0-100)"""
+                "Skills already detected in the document (do not list them again):\n"
+                f"- {skill_match or 'none'}\n"
+                "Evaluation Criteria (optional):\n"
+                f"- Job Description: {jd_prompt}\n\n"
+            ),
+        },
+        {
+            "role": "user",
+            "content": (
+                "Analyze the following text to understand its "
+                "technical details, determine overall experience level "
+                "and calculate the overall technical score.\n\n"
+                f"Document Text:\n{text}\n\n"
+                "Return JSON only."
+            ),
+        },
+    ]
+
+
+def _to_output(completion, skill_match: str) -> TechnicalAnalysisOutput:
     try: 
         logger.debug("technical_analysis_response", extra={"response": completion.choices[0].message.content})
         content = completion.choices[0].message.content or "{}"
         parsed = parse_json_block(content)
-        validated = as_technical_analysis_response(parsed)
+        validated = as_technical_analysis_response(parsed, skill_match=skill_match)
         return {
             "technicalSummary": validated["technicalSummary"],
             "skillMatch": validated["skillMatch"],
@@ -89,6 +121,7 @@ def technical_analysis(
 
 def as_technical_analysis_response(
     value,
+    skill_match: str | None = None,
 ) -> Optional[TechnicalAnalysisOutput]:
     logger.debug("validating_technical_analysis_response", extra={"value": value})
     value = _coerce_to_str(value)
@@ -96,7 +129,7 @@ def as_technical_analysis_response(
         return None
     return {
         "technicalSummary": value["technicalSummary"],
-        "skillMatch": value["skillMatch"],
+        "skillMatch": value["skillMatch"] if skill_match is None else skill_match,
         "experienceLevel": value["experienceLevel"],
         "overallScore": value["overallScore"],
     }
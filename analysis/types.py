@@ -49,6 +49,19 @@ class ReportingInput(TypedDict):
     semantic: SemanticAnalysisOutput
     psychometric: PsychometricAnalysisOutput
 
+class FusedAnalysisInput(TypedDict, total=False):
+    text: str
+    modelConfig: ModelConfig
+    criteria: dict
+    jd_prompt: Optional[str]
+
+class FusedAnalysisOutput(TypedDict):
+    technical: TechnicalAnalysisOutput
+    semantic: SemanticAnalysisOutput
+    psychometric: PsychometricAnalysisOutput
+    summary: str
+    score: int
+
 class ReportingOutput(TypedDict):
     finalScore: int
     finalReport: str
@@ -63,6 +76,18 @@ class AnalysisRequest(BaseModel):
     threshold: int | None = Field(default=None, ge=0, le=100)
     criteria: dict | None = None
     jd_prompt: str | None = None
+    fused: bool | None = None
+
+class RankRequest(BaseModel):
+    file_ids: list[str] = Field(min_length=1, description="file_ids returned by /analysis/async")
+    jd_prompt: str | None = None
+    criteria: dict | None = None
+    top_k: int = Field(default=10, ge=1)
+    enqueue: bool = False
+    ai_model: str | None = None
+    temperature: float | None = Field(default=None, ge=0.0, le=1.0)
+    threshold: int | None = Field(default=None, ge=0, le=100)
+    fused: bool | None = None
 
 class SemanticOut(BaseModel):
     semanticSummary: str
@@ -77,5 +102,12 @@ class PsychometricOut(BaseModel):
 
 
 class AnalysisResponse(BaseModel):
-    semantic: SemanticOut
-    psychometric: PsychometricOut
+    summary: str | None = None
+    score: int = 0
+    status: int | None = None
+    timings: dict[str, float] | None = None
+    compaction: dict | None = None
+    routing: dict | None = None
+    usage: dict | None = None
+    screened_out: bool = False
+    prescreen: dict | None = None
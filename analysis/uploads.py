@@ -0,0 +1,97 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+from analysis.metrics import observe
+from analysis.store import append_pdf_chunk, delete_pdf
+
+logger = logging.getLogger("backend.analysis.uploads")
+
+# Uploads are streamed into Redis chunk by chunk, so API memory per upload
+# stays around one chunk regardless of the file size.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))  # 10 MiB
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(256 * 1024)))
+# Multipart boundaries and the other form fields ride along with the file.
+_FORM_OVERHEAD = 64 * 1024
+# PDF readers accept the header anywhere in the first KiB.
+_PDF_MAGIC = b"%PDF-"
+_MAGIC_WINDOW = 1024
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes.")
+
+
+class UploadLimitMiddleware:
+    """Reject oversized request bodies on ``paths`` before they are parsed.
+
+    A declared Content-Length over the limit is answered with 413 straight
+    away; chunked bodies are counted as they arrive and cut off at the limit.
+    """
+
+    def __init__(self, app, paths: tuple[str, ...], max_bytes: int | None = None):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = (MAX_UPLOAD_BYTES if max_bytes is None else max_bytes) + _FORM_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            logger.warning("upload_rejected_too_large", extra={"content_length": int(length)})
+            response = JSONResponse({"detail": _too_large().detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+async def ingest_pdf(file: UploadFile, file_id: str) -> "hashlib._Hash":
+    """Stream ``file`` into the PDF blob for ``file_id``; returns the SHA-256 of its bytes.
+
+    The first chunk must carry the PDF header. Any failure removes the
+    partial blob. Redis writes run in a worker thread so a slow Redis doesn't
+    stall the event loop.
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise _too_large()
+
+    digest, size, redis_seconds = hashlib.sha256(), 0, 0.0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+            if size == 0 and _PDF_MAGIC not in chunk[:_MAGIC_WINDOW]:
+                raise HTTPException(status_code=400, detail="Uploaded file is not a PDF.")
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise _too_large()
+            digest.update(chunk)
+            started = time.perf_counter()
+            await asyncio.to_thread(append_pdf_chunk, file_id, chunk)
+            redis_seconds += time.perf_counter() - started
+    except Exception:
+        await asyncio.to_thread(delete_pdf, file_id)
+        raise
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    # one observation per upload rather than one metrics write per chunk
+    await asyncio.to_thread(observe, "redis_op_seconds", redis_seconds, op="append_pdf")
+    return digest
@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from analysis.ratelimit import track_wait
+
+# USD per 1M (prompt, completion) tokens. Override or extend with MODEL_PRICES,
+# a JSON object of the same shape: {"model": [prompt_price, completion_price]}.
+DEFAULT_MODEL_PRICES = {
+    "llama-3.1-8b-instant": (0.05, 0.08),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+    "meta-llama/llama-4-scout-17b-16e-instruct": (0.11, 0.34),
+    "moonshotai/kimi-k2-instruct": (1.00, 3.00),
+    "openai/gpt-oss-120b": (0.15, 0.75),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.0-flash": (0.10, 0.40),
+}
+MODEL_PRICES = {
+    **DEFAULT_MODEL_PRICES,
+    **{model: tuple(prices) for model, prices in json.loads(os.getenv("MODEL_PRICES") or "{}").items()},
+}
+
+
+def estimate_cost(model: str | None, prompt_tokens: int, completion_tokens: int) -> float | None:
+    prices = MODEL_PRICES.get(model or "")
+    if prices is None:
+        return None
+    return round((prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000, 8)
+
+
+def _tokens(completion) -> tuple[int, int]:
+    usage = getattr(completion, "usage", None)
+    return (
+        int(getattr(usage, "prompt_tokens", 0) or 0),
+        int(getattr(usage, "completion_tokens", 0) or 0),
+    )
+
+
+def _counters() -> dict:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0, "limiter_wait_ms": 0.0, "cost_usd": 0.0}
+
+
+def _add(entry: dict, prompt_tokens: int, completion_tokens: int, latency_ms: float, wait_ms: float, cost: float | None):
+    entry["calls"] += 1
+    entry["prompt_tokens"] += prompt_tokens
+    entry["completion_tokens"] += completion_tokens
+    entry["latency_ms"] = round(entry["latency_ms"] + latency_ms, 2)
+    entry["limiter_wait_ms"] = round(entry["limiter_wait_ms"] + wait_ms, 2)
+    entry["cost_usd"] = None if cost is None or entry["cost_usd"] is None else round(entry["cost_usd"] + cost, 8)
+
+
+def _record(sink: dict, stage: str, model: str, completion, latency_ms: float, wait_ms: float = 0.0) -> str:
+    """Add one call to ``sink[stage]`` and to its breakdown by the model that served it.
+
+    ``latency_ms`` is the wall time of the call, rate-limiter wait included;
+    ``wait_ms`` is the part spent blocked in the limiter. Returns the served model.
+    """
+    prompt_tokens, completion_tokens = _tokens(completion)
+    # Hedged/failed-over calls may be answered by another provider's model.
+    served = getattr(completion, "model", None) or model
+    cost = estimate_cost(served, prompt_tokens, completion_tokens)
+    entry = sink.setdefault(stage, {"model": served, **_counters(), "models": {}})
+    entry["model"] = served
+    _add(entry, prompt_tokens, completion_tokens, latency_ms, wait_ms, cost)
+    _add(entry["models"].setdefault(served, _counters()), prompt_tokens, completion_tokens, latency_ms, wait_ms, cost)
+    return served
+
+
+class UsageRecorder:
+    """``chat.completions.create`` that records token usage for one stage into ``sink``.
+
+    Cache hits never reach the client, so they are (correctly) free.
+    ``served_model`` is the model that answered the latest call.
+    """
+
+    def __init__(self, client, stage: str, sink: dict):
+        self._client = client
+        self._stage = stage
+        self._sink = sink
+        self.served_model = None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _create(self, *, model: str, **kwargs):
+        started = time.perf_counter()
+        with track_wait() as waited:
+            completion = self._client.chat.completions.create(model=model, **kwargs)
+        self.served_model = _record(self._sink, self._stage, model, completion, (time.perf_counter() - started) * 1000, waited[0] * 1000)
+        return completion
+
+
+class AsyncUsageRecorder(UsageRecorder):
+    def __init__(self, client, stage: str, sink: dict):
+        super().__init__(client, stage, sink)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_async))
+
+    async def _create_async(self, *, model: str, **kwargs):
+        started = time.perf_counter()
+        with track_wait() as waited:
+            completion = await self._client.chat.completions.create(model=model, **kwargs)
+        self.served_model = _record(self._sink, self._stage, model, completion, (time.perf_counter() - started) * 1000, waited[0] * 1000)
+        return completion
+
+
+def summarize_usage(stages: dict) -> dict:
+    """Run totals over the per-stage entries, plus the same counters per served model.
+
+    ``latency_ms`` includes ``limiter_wait_ms``; hedged calls each count
+    their own wait, so the wait can overlap other calls.
+    """
+    prompt_tokens = sum(s["prompt_tokens"] for s in stages.values())
+    completion_tokens = sum(s["completion_tokens"] for s in stages.values())
+    costs = [s["cost_usd"] for s in stages.values()]
+    return {
+        "stages": stages,
+        "models": models_used(stages),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "latency_ms": round(sum(s["latency_ms"] for s in stages.values()), 2),
+        "limiter_wait_ms": round(sum(s.get("limiter_wait_ms", 0.0) for s in stages.values()), 2),
+        "cost_usd": None if None in costs else round(sum(costs), 8),
+    }
+
+
+def models_used(stages: dict) -> dict:
+    """Counters per served model across ``stages``.
+
+    Stage entries recorded before the per-model breakdown count wholly
+    towards their ``model``.
+    """
+    totals = {}
+    for entry in stages.values():
+        breakdown = entry.get("models") or {entry.get("model") or "unknown": entry}
+        for model, counters in breakdown.items():
+            total = totals.setdefault(model, _counters())
+            for key in ("calls", "prompt_tokens", "completion_tokens"):
+                total[key] += counters.get(key) or 0
+            for key in ("latency_ms", "limiter_wait_ms"):
+                total[key] = round(total[key] + (counters.get(key) or 0.0), 2)
+            cost = counters.get("cost_usd")
+            total["cost_usd"] = None if cost is None or total["cost_usd"] is None else round(total["cost_usd"] + cost, 8)
+    return totals
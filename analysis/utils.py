@@ -1,6 +1,9 @@
 import json
 import re
 import logging  
+from groq import APIConnectionError, RateLimitError
+from analysis.metrics import inc
+from analysis.ratelimit import RateLimited, retry_after_seconds
 logger = logging.getLogger("backend.analysis.utils")
 
 def parse_json_block(value):
@@ -39,9 +42,21 @@ def _coerce_to_str(value):
         return None
 
 
+def error_kind(exc) -> str | None:
+    """``retry_policy`` kind for a stage exception, or None when it should not be retried."""
+    if isinstance(exc, (RateLimitError, RateLimited)):
+        return "rate_limit"
+    if isinstance(exc, APIConnectionError):  # includes APITimeoutError
+        return "network"
+    return None
+
+
 def retry_policy(task, exc, kind):
+    if kind in ("rate_limit", "network"):
+        inc("analysis_retries_total", kind=kind)
     if kind == "rate_limit":
-        return task.retry(exc=exc, countdown=120, max_retries=5)
+        # Honour Retry-After from the provider / shared limiter instead of a blind wait.
+        return task.retry(exc=exc, countdown=retry_after_seconds(exc, default=120), max_retries=5)
     if kind == "network":
         return task.retry(exc=exc, countdown=30, max_retries=3)
     raise exc
@@ -0,0 +1,731 @@
+"""Unit tests for the analysis pipeline: ``pytest backend/unit_test.py``."""
+import asyncio
+import hashlib
+import time
+from types import SimpleNamespace
+
+import pytest
+from celery.exceptions import Retry
+from fastapi import HTTPException
+
+from analysis import cache, metrics, ratelimit, router, routing, services, setup, singleflight, tasks, uploads, usage, utils
+from analysis.compaction import compact_text, estimate_tokens
+from analysis.prescreen import prescreen_score, should_screen_out
+from analysis.ranking import build_query, rank_texts
+from analysis.ratelimit import RateLimited
+from analysis.sections import segment
+from analysis.skills import match_skills
+
+
+class _Task:
+    """Bound-task stand-in whose ``retry`` raises ``Retry`` like Celery's does."""
+
+    def __init__(self):
+        self.retries = []
+
+    def retry(self, exc=None, countdown=None, max_retries=None):
+        self.retries.append({"exc": exc, "countdown": countdown, "max_retries": max_retries})
+        raise Retry(exc=exc, when=countdown)
+
+
+@pytest.fixture(autouse=True)
+def _no_metrics(monkeypatch):
+    monkeypatch.setattr(utils, "inc", lambda *args, **kwargs: None)
+
+
+def _stages(failing):
+    seen_tasks = []
+
+    def ok(payload, task=None):
+        seen_tasks.append(task)
+        return {"code": 200}
+
+    def fail(payload, task=None):
+        seen_tasks.append(task)
+        raise failing
+
+    return {"technical": (ok, {}), "semantic": (fail, {}), "psychometric": (ok, {})}, seen_tasks
+
+
+def test_concurrent_rate_limit_raises_retry():
+    stages, seen_tasks = _stages(RateLimited(7.0))
+    task = _Task()
+
+    with pytest.raises(Retry):
+        services._run_stages(stages, task=task, concurrent=True)
+
+    assert len(task.retries) == 1
+    assert isinstance(task.retries[0]["exc"], RateLimited)
+    assert task.retries[0]["countdown"] == 7.0
+    # pool threads never get the task: its request context is thread-local
+    assert all(seen is None for seen in seen_tasks)
+
+
+def test_concurrent_unclassified_error_is_not_retried():
+    stages, _ = _stages(ValueError("bad payload"))
+    task = _Task()
+
+    with pytest.raises(ValueError):
+        services._run_stages(stages, task=task, concurrent=True)
+
+    assert task.retries == []
+
+
+def test_concurrent_rate_limit_without_task_reraises():
+    stages, _ = _stages(RateLimited(1.0))
+
+    with pytest.raises(RateLimited):
+        services._run_stages(stages, task=None, concurrent=True)
+
+
+def _open_breaker(monkeypatch, provider: str) -> "router.CircuitBreaker":
+    monkeypatch.setattr(router, "BREAKER_COOLDOWN", 0.0)
+    breaker = router.CircuitBreaker(provider)
+    monkeypatch.setitem(router._breakers, provider, breaker)
+    for _ in range(router.BREAKER_FAILURES):
+        breaker.record_failure()
+    return breaker
+
+
+def test_breaker_planning_does_not_claim_the_probe(monkeypatch):
+    breaker = _open_breaker(monkeypatch, "gemini")
+
+    assert breaker.is_available()
+    assert breaker.is_available()  # still free: nothing was claimed
+    assert breaker.claim() == "probe"
+    assert not breaker.is_available()
+    breaker.release_probe()
+    assert breaker.is_available()
+
+
+def test_cancelled_probe_releases_the_breaker(monkeypatch):
+    breaker = _open_breaker(monkeypatch, "gemini")
+
+    async def hang(**kwargs):
+        await asyncio.sleep(3600)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=hang)))
+    provider_router = router.AsyncProviderRouter({"gemini": client}, ["gemini"], {"gemini": "m"})
+
+    async def lose_the_race():
+        call = asyncio.create_task(provider_router.chat.completions.create(model="m"))
+        await asyncio.sleep(0)
+        assert breaker.state == "half-open"
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(lose_the_race())
+    assert breaker.state == "open"
+    assert breaker.is_available()
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_rate_limited_calls_do_not_trip_the_breaker(monkeypatch, asynchronous):
+    breaker = router.CircuitBreaker("groq")
+    monkeypatch.setitem(router._breakers, "groq", breaker)
+
+    def throttled(**kwargs):
+        raise RateLimited(2.0)
+
+    async def throttled_async(**kwargs):
+        throttled()
+
+    create = throttled_async if asynchronous else throttled
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    router_cls = router.AsyncProviderRouter if asynchronous else router.ProviderRouter
+    provider_router = router_cls({"groq": client}, ["groq"], {"groq": "m"})
+
+    for _ in range(router.BREAKER_FAILURES + 1):
+        with pytest.raises(RateLimited):
+            call = provider_router.chat.completions.create(model="m")
+            if asynchronous:
+                asyncio.run(call)
+
+    assert breaker.state == "closed"
+
+
+@pytest.mark.parametrize("text", [
+    "go to the store", "led the r&d team", "R&D budget", "spring internship",
+    "I excel at teamwork", "express interest", "react to feedback", "500 ml",
+    "American Express card holder", "Spring 2020 semester", "Go developer at Acme",
+])
+def test_ambiguous_skill_words_do_not_match_prose(text):
+    assert match_skills(text) == ""
+
+
+def test_exact_case_skills_still_match():
+    skills = match_skills("Skills: Go, R, Spring Boot, Excel, React, ML, UX").split(", ")
+    assert skills == ["Go", "R", "Spring", "Excel", "React", "Machine Learning", "UX Design"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Built APIs in Express.js and Node.js", "Express, Node.js"),
+    ("Go and Rust services", "Go, Rust"),
+    ("Used Python; Spark for ETL", "Python, Spark, ETL"),
+])
+def test_english_word_skills_match_in_technical_context(text, expected):
+    assert match_skills(text) == expected
+
+
+def test_usage_is_recorded_per_served_model():
+    served = iter(["llama-3.1-8b-instant", "gemini-2.5-flash"])
+
+    def create(model, **kwargs):
+        ratelimit._note_wait(0.25)
+        return SimpleNamespace(model=next(served), usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10))
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    sink = {}
+    recorder = usage.UsageRecorder(client, "technical", sink)
+    recorder.chat.completions.create(model="llama-3.1-8b-instant")
+    recorder.chat.completions.create(model="llama-3.1-8b-instant")
+
+    models = usage.summarize_usage(sink)["models"]
+    assert set(models) == {"llama-3.1-8b-instant", "gemini-2.5-flash"}
+    assert models["gemini-2.5-flash"]["calls"] == 1
+    assert models["gemini-2.5-flash"]["cost_usd"] == usage.estimate_cost("gemini-2.5-flash", 100, 10)
+    assert sink["technical"]["limiter_wait_ms"] == 500.0
+
+
+@pytest.mark.parametrize("served, stored_under", [("m-primary", "m-primary"), ("m-fallback", "m-fallback"), (None, "m-primary")])
+def test_cache_stores_under_the_served_model(monkeypatch, served, stored_under):
+    stored = {}
+    monkeypatch.setattr(cache, "CACHE_ENABLED", True)
+    monkeypatch.setattr(cache, "get_cached", lambda key: None)
+    monkeypatch.setattr(cache, "set_cached", lambda key, value: stored.setdefault(key, value))
+    inputs = {"text": "resume", "temperature": 0.2, "jd_prompt": None, "version": 1}
+
+    cache.cached_call("technical", lambda: {"code": 200}, model="m-primary", served_model=lambda: served, **inputs)
+
+    assert list(stored) == [cache.cache_key("technical", model=stored_under, **inputs)]
+
+
+def test_single_long_line_is_cut_not_dropped():
+    line = " ".join(f"Built service{i} in Python," for i in range(6000))
+
+    compacted, stats = compact_text(line, max_tokens=3000)
+
+    assert compacted and line.startswith(compacted)
+    assert line[len(compacted)] == " "  # cut on a word boundary
+    assert stats["truncated"] and 0 < stats["compacted_tokens"] <= 3000
+
+
+@pytest.mark.parametrize("text", ["x" * 50000, "a few words", "Python " * 10])
+def test_non_empty_input_never_compacts_to_empty(text):
+    assert compact_text(text, max_tokens=1)[0]
+
+
+def test_compaction_drops_page_numbers_and_running_headers():
+    page = "Jane Doe - Resume\nSenior engineer building data platforms at scale for many years.\nPage {n}"
+    text = "\x0c".join(page.format(n=n) for n in (1, 2, 3))
+
+    compacted, stats = compact_text(text, max_tokens=0)
+
+    assert compacted.count("Jane Doe - Resume") == 1
+    assert compacted.count("Senior engineer") == 1
+    assert "Page" not in compacted
+    assert not stats["truncated"]
+    assert estimate_tokens(compacted) == stats["compacted_tokens"]
+
+
+_RESUME = """Jane Doe
+jane@example.com
+
+PROFESSIONAL SUMMARY
+Backend engineer focused on reliable data platforms.
+
+Work Experience
+Senior Engineer, Acme (2019-2024)
+Leadership of migration to Kubernetes
+Tools used daily: Docker, Terraform
+Experience with on-call rotations for payments
+Leadership: mentored four engineers
+
+Skills: Python, Go, PostgreSQL
+
+EDUCATION
+BSc Computer Science"""
+
+
+def test_segment_finds_real_headings():
+    assert [s["type"] for s in segment(_RESUME)] == ["header", "summary", "experience", "skills", "education"]
+
+
+@pytest.mark.parametrize("bullet", [
+    "Leadership of migration to Kubernetes",
+    "Tools used daily: Docker, Terraform",
+    "Experience with on-call rotations for payments",
+    "Leadership: mentored four engineers",
+])
+def test_bullets_starting_with_heading_words_stay_in_experience(bullet):
+    experience = next(s for s in segment(_RESUME) if s["type"] == "experience")
+    assert bullet in experience["text"].split("\n")
+
+
+@pytest.mark.parametrize("asynchronous", [False, True])
+def test_groq_sdk_retries_are_off_under_the_shared_limiter(monkeypatch, asynchronous):
+    built = {}
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(setup, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(setup, "AsyncGroq" if asynchronous else "Groq", lambda **kwargs: built.update(kwargs))
+
+    setup._build_client("groq", asynchronous=asynchronous)
+
+    assert built["max_retries"] == 0
+
+
+def test_async_groq_pool_is_sized_separately_with_a_pool_timeout(monkeypatch):
+    built = {}
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setattr(setup, "AsyncGroq", lambda **kwargs: built.update(kwargs))
+    monkeypatch.setattr(setup.httpx, "AsyncClient", lambda **kwargs: kwargs)
+
+    setup._build_client("groq", asynchronous=True)
+
+    http_client = built["http_client"]
+    assert http_client["limits"].max_connections == setup.GROQ_ASYNC_MAX_CONNECTIONS
+    assert http_client["timeout"].pool == setup.GROQ_POOL_TIMEOUT
+
+
+class _FlakyRedis:
+    """Metrics Redis stand-in whose ``hgetall`` fails for the keys in ``broken``."""
+
+    def __init__(self, broken):
+        self.broken = broken
+
+    def hgetall(self, key):
+        if key in self.broken:
+            raise metrics.redis.ConnectionError("connection reset")
+        return {b"stage=\"technical\"": b"3"}
+
+
+def test_metrics_render_skips_families_redis_fails_on(monkeypatch):
+    def no_cache_stats():
+        raise metrics.redis.TimeoutError("timed out")
+
+    monkeypatch.setattr(metrics, "_redis", lambda: _FlakyRedis({"metrics:redis_op_seconds"}))
+    monkeypatch.setattr(metrics, "_queue_depths", lambda: {"analysis": 2})
+    monkeypatch.setattr(cache, "cache_stats", no_cache_stats)
+
+    text = metrics.render()
+
+    assert "redis_op_seconds" not in text
+    assert "llm_cache_hits_total" not in text
+    assert 'analysis_retries_total{stage="technical"} 3' in text
+    assert 'celery_queue_depth{queue="analysis"} 2' in text
+
+
+class _Upload:
+    """``UploadFile`` stand-in serving ``data`` in reads of at most ``size`` bytes."""
+
+    def __init__(self, data: bytes, declared: int | None = None):
+        self.data = data
+        self.size = declared
+
+    async def read(self, size: int) -> bytes:
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+
+@pytest.fixture
+def _blob(monkeypatch):
+    blob = {"chunks": [], "deleted": False}
+    monkeypatch.setattr(uploads, "append_pdf_chunk", lambda file_id, chunk: blob["chunks"].append(chunk))
+    monkeypatch.setattr(uploads, "delete_pdf", lambda file_id: blob.update(deleted=True))
+    monkeypatch.setattr(uploads, "observe", lambda *args, **kwargs: None)
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", 1000)
+    monkeypatch.setattr(uploads, "UPLOAD_CHUNK_BYTES", 300)
+    return blob
+
+
+def test_upload_is_streamed_in_chunks_and_hashed(_blob):
+    data = b"%PDF-1.7\n" + b"x" * 700
+
+    digest = asyncio.run(uploads.ingest_pdf(_Upload(data), "f1"))
+
+    assert digest.hexdigest() == hashlib.sha256(data).hexdigest()
+    assert b"".join(_blob["chunks"]) == data
+    assert max(len(chunk) for chunk in _blob["chunks"]) == 300
+    assert not _blob["deleted"]
+
+
+@pytest.mark.parametrize("upload", [
+    _Upload(b"%PDF-" + b"x" * 995, declared=5000),  # declared size over the limit
+    _Upload(b"%PDF-" + b"x" * 1200),                # size unknown, cut off while streaming
+])
+def test_oversized_upload_is_rejected_with_413(_blob, upload):
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(uploads.ingest_pdf(upload, "f1"))
+
+    assert raised.value.status_code == 413
+    assert _blob["deleted"] or not _blob["chunks"]
+
+
+@pytest.mark.parametrize("data", [b"", b"GIF89a not a pdf"])
+def test_empty_or_non_pdf_upload_is_rejected_with_400(_blob, data):
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(uploads.ingest_pdf(_Upload(data), "f1"))
+
+    assert raised.value.status_code == 400
+    assert not _blob["chunks"]
+
+
+def _asgi_call(headers: dict, body: bytes):
+    sent, reached = [], []
+
+    async def app(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        reached.append(scope["path"])
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/analysis/async",
+        "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+    }
+    middleware = uploads.UploadLimitMiddleware(app, paths=("/analysis/async",), max_bytes=0)
+    asyncio.run(middleware(scope, receive, send))
+    return sent, reached
+
+
+def test_upload_middleware_answers_413_on_declared_length():
+    sent, reached = _asgi_call({"content-length": str(10**7)}, b"")
+
+    assert sent[0]["status"] == 413
+    assert not reached
+
+
+def test_upload_middleware_cuts_off_chunked_bodies():
+    with pytest.raises(HTTPException) as raised:
+        _asgi_call({"transfer-encoding": "chunked"}, b"x" * (uploads._FORM_OVERHEAD + 1))
+
+    assert raised.value.status_code == 413
+
+
+_CANDIDATES = {
+    "backend": "Python developer: Django, PostgreSQL, Redis and Celery services on AWS.",
+    "frontend": "Frontend engineer building React and TypeScript interfaces with CSS.",
+    "designer": "Graphic designer working in Figma and Illustrator on brand identity.",
+}
+
+
+def test_tfidf_ranks_the_closest_resume_first():
+    ranked = rank_texts(_CANDIDATES, build_query("Backend Python engineer with Django and Redis"))
+
+    assert [row["file_id"] for row in ranked][0] == "backend"
+    assert [row["rank"] for row in ranked] == [1, 2, 3]
+    assert ranked[0]["score"] > ranked[1]["score"] >= ranked[2]["score"] == 0
+
+
+def test_tfidf_top_k_keeps_the_best_in_order():
+    query = build_query(criteria={"role": "React frontend engineer", "job_description": "TypeScript, CSS"})
+
+    ranked = rank_texts(_CANDIDATES, query, top_k=1)
+
+    assert [row["file_id"] for row in ranked] == ["frontend"]
+
+
+def test_tfidf_unmatched_query_scores_zero_in_input_order():
+    ranked = rank_texts(_CANDIDATES, "underwater basket weaving")
+
+    assert [row["file_id"] for row in ranked] == list(_CANDIDATES)
+    assert all(row["score"] == 0 for row in ranked)
+    assert rank_texts({}, "python") == []
+
+
+def test_short_documents_route_extraction_stages_to_the_fast_tier(monkeypatch):
+    monkeypatch.setattr(routing, "MODEL_ROUTING_ENABLED", True)
+
+    routes = routing.route_models("groq", "short resume")
+
+    assert routes["length"] == "short"
+    assert routes["stages"]["technical"] == {"tier": "fast", "model": routing.tier_model("groq", "fast")}
+    assert routes["stages"]["summary"]["tier"] == "large"
+
+
+def test_long_documents_and_caller_model_take_the_large_tier(monkeypatch):
+    monkeypatch.setattr(routing, "MODEL_ROUTING_ENABLED", True)
+    monkeypatch.setattr(routing, "ROUTING_SHORT_TOKENS", 10)
+    text = "experienced engineer " * 50
+
+    routes = routing.route_models("groq", text, model="caller-model")
+
+    assert routes["length"] == "long"
+    assert routes["stages"]["technical"] == {"tier": "large", "model": "caller-model"}
+    assert routes["stages"]["semantic"]["tier"] == "fast"
+    # a stage routed on its own short section input stays on the fast tier
+    per_stage = routing.route_models("groq", text, stage_texts={"technical": "Python"})
+    assert per_stage["stages"]["technical"]["tier"] == "fast"
+
+
+def test_disabled_routing_pins_every_stage(monkeypatch):
+    monkeypatch.setattr(routing, "MODEL_ROUTING_ENABLED", False)
+
+    routes = routing.route_models("groq", "resume", default_model="pinned-model")
+
+    assert {stage["model"] for stage in routes["stages"].values()} == {"pinned-model"}
+
+
+class _Redis:
+    """The few string commands single-flight uses, kept in a dict."""
+
+    def __init__(self):
+        self.data = {}
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+def test_identical_submissions_join_the_run_in_flight(monkeypatch):
+    monkeypatch.setattr(singleflight, "r", _Redis())
+    fp = singleflight.fingerprint(b"%PDF-1.7 resume", {"role": "SRE", "temperature": 0.2})
+    assert fp == singleflight.fingerprint(b"%PDF-1.7 resume", {"temperature": 0.2, "role": "SRE"})
+
+    assert asyncio.run(singleflight.join_or_lock(fp)) is None  # first caller owns the lock
+    singleflight.publish(fp, {"task_id": "t1", "file_id": "f1"})
+
+    assert asyncio.run(singleflight.join_or_lock(fp))["task_id"] == "t1"
+
+
+def test_pointer_to_a_dead_run_is_dropped(monkeypatch):
+    monkeypatch.setattr(singleflight, "r", _Redis())
+    fp = singleflight.fingerprint("resume", {})
+    asyncio.run(singleflight.join_or_lock(fp))
+    singleflight.publish(fp, {"task_id": "failed"})
+
+    assert asyncio.run(singleflight.join_or_lock(fp, is_alive=lambda task_id: False)) is None
+    assert "pending" in singleflight.r.get(singleflight._key(fp))
+
+
+def test_concurrent_callers_share_one_in_process_run():
+    calls = []
+
+    async def analyse():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"score": 80}
+
+    async def burst():
+        return await asyncio.gather(*(singleflight.coalesce("fp", analyse) for _ in range(5)))
+
+    assert asyncio.run(burst()) == [{"score": 80}] * 5
+    assert len(calls) == 1
+    assert "fp" not in singleflight._inflight
+
+
+_STAGE_SECONDS = 0.1
+
+
+def _completion(content: str):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=50, completion_tokens=5),
+        model="llama-3.1-8b-instant",
+    )
+
+
+@pytest.fixture
+def _pipeline(monkeypatch):
+    """run_full_analysis with uncached stand-in stages and an LLM that only writes summaries."""
+    calls = []
+
+    def stage(name):
+        def run(payload, task=None):
+            calls.append(name)
+            time.sleep(_STAGE_SECONDS)
+            return {"code": 200, "stage": name}
+
+        async def run_async(payload):
+            calls.append(name)
+            await asyncio.sleep(_STAGE_SECONDS)
+            return {"code": 200, "stage": name}
+
+        return run, run_async, 1
+
+    def create(**kwargs):
+        calls.append("summary")
+        return _completion('{"summary": "Solid backend profile.", "score": 77}')
+
+    async def create_async(**kwargs):
+        return create(**kwargs)
+
+    async def uncached_async(stage, fn, **kwargs):
+        return await fn()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create_async)))
+    monkeypatch.setattr(services, "STAGE_FUNCTIONS", {name: stage(name) for name in services.STAGE_FUNCTIONS})
+    monkeypatch.setattr(services, "get_llm_client", lambda: (client, "groq"))
+    monkeypatch.setattr(services, "get_async_llm_client", lambda: (async_client, "groq"))
+    monkeypatch.setattr(services, "cached_call", lambda stage, fn, **kwargs: fn())
+    monkeypatch.setattr(services, "cached_call_async", uncached_async)
+    monkeypatch.setattr(services, "observe", lambda *args, **kwargs: None)
+    monkeypatch.setattr(services, "inc", lambda *args, **kwargs: None)
+    monkeypatch.setattr(services, "FUSED_MODE", False)
+    return calls
+
+
+def test_stages_run_concurrently_and_report_timings(_pipeline):
+    notified = []
+
+    started = time.perf_counter()
+    result = services.run_full_analysis(
+        "Python engineer", concurrent=True, on_stage=lambda stage, data: notified.append(stage)
+    )
+    elapsed = time.perf_counter() - started
+
+    assert result["score"] == 77
+    assert elapsed < 3 * _STAGE_SECONDS  # sequential would take at least 3x
+    assert set(result["timings"]) == {"technical", "semantic", "psychometric", "summary", "total"}
+    assert all(result["timings"][stage] >= _STAGE_SECONDS * 1000 for stage in ("technical", "semantic", "psychometric"))
+    assert sorted(notified[:3]) == ["psychometric", "semantic", "technical"]
+    assert notified[3] == "summary"
+
+
+def test_sequential_stages_keep_the_same_result(_pipeline):
+    result = services.run_full_analysis("Python engineer", concurrent=False)
+
+    assert result["score"] == 77
+    assert _pipeline == ["technical", "semantic", "psychometric", "summary"]
+
+
+def test_fused_mode_answers_in_one_call(_pipeline, monkeypatch):
+    combined = {name: {"code": 200} for name in ("technical", "semantic", "psychometric")}
+    monkeypatch.setattr(services, "fused_analysis", lambda payload, task=None: {**combined, "summary": "One pass.", "score": 64})
+
+    result = services.run_full_analysis("Python engineer", fused=True)
+
+    assert (result["summary"], result["score"]) == ("One pass.", 64)
+    assert set(result["timings"]) == {"fused", "total"}
+    assert _pipeline == []
+
+
+def test_unparseable_fused_reply_falls_back_to_staged_analysis(_pipeline):
+    # The stand-in LLM only writes summaries, so the real fused validator rejects it.
+    result = services.run_full_analysis("Python engineer", fused=True)
+
+    assert result["score"] == 77
+    assert _pipeline.count("summary") == 2  # the rejected fused call, then the real summary
+    assert {"technical", "semantic", "psychometric"} <= set(_pipeline)
+    assert "fused" not in result["timings"]
+
+
+def test_async_path_matches_the_worker_path(_pipeline):
+    started = time.perf_counter()
+    result = asyncio.run(services.run_full_analysis_async("Python engineer"))
+    elapsed = time.perf_counter() - started
+
+    assert (result["summary"], result["score"]) == ("Solid backend profile.", 77)
+    assert elapsed < 3 * _STAGE_SECONDS  # stages are gathered on the loop
+    assert set(result["timings"]) == {"technical", "semantic", "psychometric", "summary", "total"}
+    assert result["usage"]["total_tokens"] == 55  # only the summary reached the LLM
+
+
+def test_async_path_falls_back_from_a_rejected_fused_reply(_pipeline):
+    result = asyncio.run(services.run_full_analysis_async("Python engineer", fused=True))
+
+    assert result["score"] == 77
+    assert "fused" not in result["timings"]
+
+
+def test_async_path_reports_failure_without_raising(_pipeline, monkeypatch):
+    async def broken(stages):
+        raise RuntimeError("stage crashed")
+
+    monkeypatch.setattr(services, "_run_stages_async", broken)
+
+    assert asyncio.run(services.run_full_analysis_async("Python engineer"))["status"] == 500
+
+
+@pytest.fixture
+def _extraction(monkeypatch):
+    """extract_text_task over in-memory blobs, caches and a counting parser."""
+    state = {"blobs": {}, "cache": {}, "texts": {}, "parsed": 0}
+
+    def parse(pdf_bytes):
+        state["parsed"] += 1
+        stats = {"pages": 1, "total_pages": 1, "truncated": False, "mode": "serial", "workers": 1, "total_ms": 5.0}
+        return {"text": f"Resume {pdf_bytes.decode()}\nPython, Django", "stats": stats, "fields": {}}
+
+    def store_cached(digest, variant, data):
+        state["cache"][(digest, variant)] = data
+
+    monkeypatch.setattr(tasks.extract_text_task, "update_state", lambda **kwargs: None)
+    monkeypatch.setattr(tasks, "load_pdf", lambda file_id: state["blobs"][file_id])
+    monkeypatch.setattr(tasks, "load_cached_extraction", lambda digest, variant: state["cache"].get((digest, variant)))
+    monkeypatch.setattr(tasks, "store_cached_extraction", store_cached)
+    monkeypatch.setattr(tasks, "load_document", lambda digest, variant: None)
+    monkeypatch.setattr(tasks, "store_document", lambda digest, document: None)
+    monkeypatch.setattr(tasks, "parse_document", parse)
+    monkeypatch.setattr(tasks, "store_extracted_text", lambda file_id, text: state["texts"].update({file_id: text}))
+    monkeypatch.setattr(tasks, "publish_event", lambda *args, **kwargs: None)
+    monkeypatch.setattr(tasks, "inc", lambda *args, **kwargs: None)
+    monkeypatch.setattr(tasks, "observe", lambda *args, **kwargs: None)
+    return state
+
+
+def test_reuploaded_pdf_reuses_the_cached_extraction(_extraction):
+    _extraction["blobs"].update({"first": b"alice", "again": b"alice", "other": b"bob"})
+
+    first = tasks.extract_text_task.run("first", "alice.pdf")
+    again = tasks.extract_text_task.run("again", "alice-v2.pdf")
+
+    assert _extraction["parsed"] == 1
+    assert "cached" not in first["extraction"]
+    assert again["extraction"]["cached"] is True
+    assert again["compaction"] == first["compaction"]
+    assert _extraction["texts"]["again"] == _extraction["texts"]["first"]
+
+    tasks.extract_text_task.run("other", "bob.pdf")
+    assert _extraction["parsed"] == 2
+    assert "Resume bob" in _extraction["texts"]["other"]
+
+
+def test_prescreen_weighs_explicit_skills_twice():
+    prescreen = prescreen_score(
+        "Built services in Python and Go on Kubernetes.",
+        jd_prompt="Python, Kubernetes, Terraform",
+        criteria={"job_description": "Operate observability tooling"},
+    )
+
+    assert prescreen["matched"] == ["kubernetes", "python"]
+    assert prescreen["missing"] == ["terraform"]
+    assert prescreen["score"] == round(100 * 4 / 9)
+
+
+@pytest.mark.parametrize("score, terms, threshold, expected", [
+    (10, 6, 60, True),    # far under the threshold
+    (40, 6, 60, False),   # inside the margin: let the LLM decide
+    (0, 2, 60, False),    # too few JD terms to judge
+    (0, 6, None, False),  # no threshold, nothing to screen against
+])
+def test_prescreen_only_screens_out_clear_mismatches(score, terms, threshold, expected):
+    assert should_screen_out({"score": score, "terms": terms}, threshold) is expected
+
+
+def test_screened_out_resume_never_reaches_the_llm(_pipeline):
+    result = services.run_full_analysis(
+        "Watercolour painter and gallery curator.", threshold=70, jd_prompt="Python, Django, PostgreSQL, Redis"
+    )
+
+    assert result["screened_out"] is True
+    assert result["score"] == 0
+    assert _pipeline == []
@@ -0,0 +1,304 @@
+"""Open-loop load generator for /analysis and /analysis/async.
+
+Start the stand-in provider, then the API and workers against it, then drive load:
+
+    python -m bench.simulated_llm --port 8089 --rate-429 0.02
+    GROQ_API_KEY=sim GROQ_BASE_URL=http://127.0.0.1:8089 ./build.sh
+    python -m bench.loadgen --api http://127.0.0.1:8001 --mode async --rate 5 --duration 60
+
+Requests arrive at ``--rate`` per second whether or not earlier ones have
+finished, so queueing shows up as latency instead of being hidden.
+
+Queue wait is not observable from outside (the status endpoint tracks the
+last task of the chain), so it is read from the API's ``/metrics``: the
+``analysis_queue_wait_seconds`` histogram is scraped before and after the
+run and the difference reported per queue and task. Its percentiles are
+bucket upper bounds.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import defaultdict
+
+import httpx
+
+from bench import simulated_llm
+from bench.pdfgen import make_pdf, resume_text
+
+TERMINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+QUEUE_WAIT_METRIC = "analysis_queue_wait_seconds"
+_SAMPLE = re.compile(r'^(?P<name>\w+?)_(?P<part>bucket|sum|count)(?:\{(?P<labels>.*)\})? (?P<value>\S+)$')
+_LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def parse_histogram(text: str, name: str) -> dict:
+    """``{"queue:task": {"buckets": {le: cumulative}, "sum": s, "count": n}}`` from Prometheus text."""
+    series = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match or match["name"] != name:
+            continue
+        labels = dict(_LABEL.findall(match["labels"] or ""))
+        le = labels.pop("le", None)
+        key = ":".join(labels.get(k, "-") for k in ("queue", "task"))
+        entry = series.setdefault(key, {"buckets": {}, "sum": 0.0, "count": 0.0})
+        if match["part"] == "bucket":
+            entry["buckets"][le] = float(match["value"])
+        else:
+            entry[match["part"]] = float(match["value"])
+    return series
+
+
+def histogram_delta(after: dict, before: dict) -> dict:
+    delta = {}
+    for key, entry in after.items():
+        prior = before.get(key, {"buckets": {}, "sum": 0.0, "count": 0.0})
+        count = entry["count"] - prior["count"]
+        if count > 0:
+            delta[key] = {
+                "buckets": {le: n - prior["buckets"].get(le, 0.0) for le, n in entry["buckets"].items()},
+                "sum": entry["sum"] - prior["sum"],
+                "count": count,
+            }
+    return delta
+
+
+def histogram_percentile(entry: dict, pct: float) -> float | None:
+    """Upper bound (ms) of the bucket holding the ``pct`` percentile; None past the last bucket."""
+    target = pct / 100 * entry["count"]
+    for le, cumulative in sorted(entry["buckets"].items(), key=lambda item: float(item[0])):
+        if cumulative >= target:
+            return None if le == "+Inf" else float(le) * 1000
+    return None
+
+
+def summarize_histogram(entry: dict) -> dict:
+    return {
+        "count": int(entry["count"]),
+        "mean": entry["sum"] / entry["count"] * 1000,
+        "p50": histogram_percentile(entry, 50),
+        "p95": histogram_percentile(entry, 95),
+        "p99": histogram_percentile(entry, 99),
+    }
+
+
+async def scrape_queue_wait(client: httpx.AsyncClient) -> dict | None:
+    try:
+        resp = await client.get("/metrics")
+        resp.raise_for_status()
+    except httpx.HTTPError:
+        return None
+    return parse_histogram(resp.text, QUEUE_WAIT_METRIC)
+
+
+class Recorder:
+    def __init__(self):
+        self.latency_ms = defaultdict(list)  # mode -> end-to-end
+        self.stage_ms = defaultdict(list)  # stage -> reported timing
+        self.queue_wait = None  # "queue:task" -> server-side histogram delta, None if /metrics was unavailable
+        self.outcomes = defaultdict(int)
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def stages(self, result: dict | None):
+        for stage, ms in ((result or {}).get("timings") or {}).items():
+            self.stage_ms[stage].append(ms)
+
+    def report(self, llm: simulated_llm.SimulatedLLM | None = None) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        total = sum(self.outcomes.values())
+        ok = self.outcomes.get("ok", 0)
+        report = {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "throughput_rps": round(ok / elapsed, 3) if elapsed else None,
+            "error_rate": round((total - ok) / total, 4) if total else None,
+            "outcomes": dict(self.outcomes),
+            "latency_ms": {mode: summarize(values) for mode, values in self.latency_ms.items()},
+            "queue_wait_ms": None if self.queue_wait is None else {
+                key: summarize_histogram(entry) for key, entry in sorted(self.queue_wait.items())
+            },
+            "stage_ms": {stage: summarize(values) for stage, values in sorted(self.stage_ms.items())},
+        }
+        if llm is not None:
+            report["simulated_llm"] = dict(llm.stats)
+        return report
+
+
+def _params(args) -> dict:
+    return {
+        "ai_model": args.model,
+        "threshold": args.threshold,
+        "jd_prompt": args.jd_prompt,
+    }
+
+
+async def run_sync(client: httpx.AsyncClient, args, seq: int, rec: Recorder):
+    seed = seq if args.unique else 0
+    started = time.perf_counter()
+    try:
+        resp = await client.post("/analysis", json={
+            "document_text": resume_text(args.pages * 45, seed=seed),
+            **_params(args),
+        })
+    except httpx.HTTPError as exc:
+        rec.outcomes[f"transport:{type(exc).__name__}"] += 1
+        return
+    rec.latency_ms["sync"].append((time.perf_counter() - started) * 1000)
+    if resp.status_code != 200:
+        rec.outcomes[f"http_{resp.status_code}"] += 1
+        return
+    body = resp.json()
+    rec.stages(body)
+    rec.outcomes["ok" if body.get("status") in (None, 200) else "analysis_failed"] += 1
+
+
+async def run_async(client: httpx.AsyncClient, args, seq: int, rec: Recorder):
+    seed = seq if args.unique else 0
+    started = time.perf_counter()
+    try:
+        resp = await client.post(
+            "/analysis/async",
+            files={"file": (f"resume-{seed}.pdf", make_pdf(args.pages, seed=seed), "application/pdf")},
+            data={k: str(v) for k, v in _params(args).items() if v is not None},
+        )
+    except httpx.HTTPError as exc:
+        rec.outcomes[f"transport:{type(exc).__name__}"] += 1
+        return
+    if resp.status_code != 200:
+        rec.outcomes[f"http_{resp.status_code}"] += 1
+        return
+    task_id = resp.json()["task_id"]
+
+    deadline = started + args.timeout
+    state, status = "PENDING", {}
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(args.poll_interval)
+        try:
+            status = (await client.get(f"/analysis/status/{task_id}")).json()
+        except (httpx.HTTPError, ValueError):
+            continue
+        state = status.get("state", state)
+        if state in TERMINAL_STATES:
+            break
+
+    rec.latency_ms["async"].append((time.perf_counter() - started) * 1000)
+    if state != "SUCCESS":
+        rec.outcomes["timeout" if state not in TERMINAL_STATES else state.lower()] += 1
+        return
+    result = status.get("result") or {}
+    rec.stages(result)
+    rec.outcomes["ok" if result.get("summary") is not None or result.get("screened_out") else "analysis_failed"] += 1
+
+
+async def drive(args, rec: Recorder):
+    modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+    limits = httpx.Limits(max_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.api, timeout=args.timeout, limits=limits) as client:
+        queue_wait_before = await scrape_queue_wait(client)
+        rng = random.Random(args.seed)
+        in_flight, tasks = asyncio.Semaphore(args.max_in_flight), []
+
+        async def one(seq: int, mode: str):
+            async with in_flight:
+                runner = run_sync if mode == "sync" else run_async
+                await runner(client, args, seq, rec)
+
+        next_at = time.perf_counter()
+        end_at = next_at + args.duration
+        seq = 0
+        while next_at < end_at:
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            tasks.append(asyncio.create_task(one(seq, modes[seq % len(modes)])))
+            seq += 1
+            # Poisson arrivals at the target rate.
+            next_at += rng.expovariate(args.rate)
+        await asyncio.gather(*tasks)
+        rec.finished = time.perf_counter()
+        queue_wait_after = await scrape_queue_wait(client)
+    if queue_wait_before is not None and queue_wait_after is not None:
+        rec.queue_wait = histogram_delta(queue_wait_after, queue_wait_before)
+
+
+def _print_table(report: dict):
+    print(f"\n{report['requests']} requests in {report['elapsed_s']}s  "
+          f"throughput={report['throughput_rps']} rps  error_rate={report['error_rate']}")
+    print(f"outcomes: {report['outcomes']}")
+    rows = [(f"e2e:{mode}", stats) for mode, stats in report["latency_ms"].items()]
+    rows += [(f"stage:{stage}", stats) for stage, stats in report["stage_ms"].items()]
+    print(f"{'metric':<22}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    fmt = lambda v: "-" if v is None else f"{v:.0f}"
+    for name, stats in rows:
+        print(f"{name:<22}{stats['count']:>7}{fmt(stats['p50']):>10}{fmt(stats['p95']):>10}"
+              f"{fmt(stats['p99']):>10}{fmt(stats['max']):>10}")
+    if report["queue_wait_ms"] is None:
+        print("queue wait: /metrics unavailable")
+    else:
+        print("\nqueue wait from /metrics (ms, p* are bucket upper bounds)")
+        print(f"{'queue:task':<52}{'count':>7}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for name, stats in report["queue_wait_ms"].items():
+            print(f"{name:<52}{stats['count']:>7}{fmt(stats['mean']):>10}{fmt(stats['p50']):>10}"
+                  f"{fmt(stats['p95']):>10}{fmt(stats['p99']):>10}")
+    if "simulated_llm" in report:
+        print(f"simulated llm: {report['simulated_llm']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", default="http://127.0.0.1:8001")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="async")
+    parser.add_argument("--rate", type=float, default=2.0, help="target arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--max-in-flight", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--unique", action=argparse.BooleanOptionalAction, default=True,
+                        help="vary every document so caches and coalescing don't absorb the load")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--threshold", type=int, default=None)
+    parser.add_argument("--jd-prompt", default=None)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the report to this file")
+    parser.add_argument("--simulate", action="store_true",
+                        help="serve the simulated LLM from this process (point GROQ_BASE_URL at --sim-port)")
+    parser.add_argument("--sim-port", type=int, default=8089)
+    simulated_llm.add_arguments(parser)
+    args = parser.parse_args()
+
+    llm = None
+    if args.simulate:
+        llm = simulated_llm.from_args(args)
+        simulated_llm.serve(llm, port=args.sim_port)
+        print(f"Simulated LLM on http://127.0.0.1:{args.sim_port}")
+
+    rec = Recorder()
+    asyncio.run(drive(args, rec))
+    report = rec.report(llm)
+    _print_table(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Micro-benchmarks for the hot pure-Python paths, with stored baselines.
+
+    python -m bench.micro                       # run and print
+    python -m bench.micro --json out.json       # machine-readable results
+    python -m bench.micro --compare             # exit 1 on a regression vs bench/baselines.json
+    python -m bench.micro --update-baseline --note "..."  # record the current run as the baseline
+
+Each benchmark is a setup function returning the zero-argument operation to
+time; setup failing with a missing module or unreachable Redis skips it.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.pdfgen import make_pdf, resume_text
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+DEFAULT_THRESHOLD = 0.20  # fail --compare when the median is 20% slower
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# -------- analysis/utils.py --------
+_STAGE_JSON = json.dumps({
+    "technicalSummary": "Backend engineer with production Python and cloud experience.",
+    "experienceLevel": "Senior",
+    "overallScore": 78,
+    "keyThemes": ["backend", "scalability", "ownership"],
+})
+_NESTED_JSON = json.dumps({
+    "technical": {"technicalSummary": "x" * 200, "skills": [{"name": f"skill{i}", "years": i} for i in range(20)]},
+    "semantic": {"keyThemes": ["a", "b", "c"], "overallSentiment": "Positive"},
+    "summary": "y" * 400,
+    "score": 81,
+})
+
+for _name, _payload in {
+    "plain": _STAGE_JSON,
+    "fenced": f"Here is the analysis:\n```json\n{_STAGE_JSON}\n```\nLet me know if you need more.",
+    "nested": f"```json\n{_NESTED_JSON}\n```",
+    "malformed": f"Sure! {_STAGE_JSON[:-20]} ... truncated",
+}.items():
+    def _setup(payload=_payload):
+        from analysis.utils import parse_json_block
+        return lambda: parse_json_block(payload)
+    benchmark(f"parse_json_block.{_name}")(_setup)
+
+
+@benchmark("coerce_to_str.stage_output")
+def _coerce():
+    from analysis.utils import _coerce_to_str
+    value = json.loads(_STAGE_JSON)
+    return lambda: _coerce_to_str(value)
+
+
+# -------- PDF extraction --------
+# Pinned to serial, uncapped extraction so the parallel pool and the page/char
+# caps (PDF_PARALLEL_*, PDF_MAX_*) don't change what these measure.
+for _pages in (1, 5, 30):
+    def _setup(pages=_pages):
+        from utils.pdf_extract import extract_text
+        pdf = make_pdf(pages, seed=pages)
+        return lambda: extract_text(pdf, parallel=False, max_pages=0, max_chars=0)
+    benchmark(f"pdf_extract.serial.{_pages}p")(_setup)
+
+
+# -------- analysis/store.py (local Redis) --------
+def _redis_store():
+    from analysis import store
+    store.r.ping()
+    return store
+
+
+def _unwrapped(fn):
+    # Skip the @timed wrapper: its own Redis write for the metric would be
+    # timed along with the operation.
+    return getattr(fn, "__wrapped__", fn)
+
+
+@benchmark("store.pdf_roundtrip.30p")
+def _store_pdf():
+    store = _redis_store()
+    store_pdf, load_pdf = _unwrapped(store.store_pdf), _unwrapped(store.load_pdf)
+    pdf = make_pdf(30)
+
+    def op():
+        store_pdf("bench", pdf, ttl=60)
+        load_pdf("bench")
+    return op
+
+
+@benchmark("store.text_roundtrip")
+def _store_text():
+    store = _redis_store()
+    store_extracted_text, load_extracted_text = _unwrapped(store.store_extracted_text), _unwrapped(store.load_extracted_text)
+    text = resume_text(200)
+
+    def op():
+        store_extracted_text("bench", text, ttl=60)
+        load_extracted_text("bench")
+    return op
+
+
+@benchmark("store.analysis_roundtrip")
+def _store_analysis():
+    store = _redis_store()
+    store_analysis, load_analysis = _unwrapped(store.store_analysis), _unwrapped(store.load_analysis)
+    result = json.loads(_NESTED_JSON)
+
+    def op():
+        store_analysis("bench", "full", result, ttl=60)
+        load_analysis("bench", "full")
+    return op
+
+
+# -------- Celery payloads --------
+@benchmark("celery.chain_serialization")
+def _celery_chain():
+    from celery import chain
+    from kombu.serialization import dumps, loads
+    from backend.celery_app import celery_app
+
+    sig = chain(
+        celery_app.signature("analysis.tasks.extract_text_task", args=("0" * 32, "resume.pdf")),
+        celery_app.signature("analysis.tasks.analyze_resume_task", kwargs={
+            "ai_model": "llama-3.1-8b-instant",
+            "temperature": 0.2,
+            "threshold": 70,
+            "criteria": {"company_name": "Acme", "role": "Backend", "experience_level": 5, "job_description": "z" * 1500},
+            "jd_prompt": "Python, Django, AWS",
+            "fused": False,
+        }),
+        celery_app.signature("analysis.tasks.reporting_task"),
+    )
+
+    def op():
+        content_type, encoding, body = dumps(dict(sig), serializer=celery_app.conf.task_serializer)
+        loads(body, content_type, encoding)
+    return op
+
+
+@benchmark("celery.result_serialization")
+def _celery_result():
+    from kombu.serialization import dumps, loads
+    report = {"file_id": "0" * 32, **json.loads(_NESTED_JSON), "timings": {"technical": 812.4, "summary": 655.1}}
+
+    def op():
+        content_type, encoding, body = dumps(report, serializer="json")
+        loads(body, content_type, encoding)
+    return op
+
+
+def _measure(op, min_time: float, repeats: int) -> dict:
+    op()  # warm-up
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            op()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            op()
+        samples.append((time.perf_counter() - started) / loops)
+    return {
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "min_us": round(min(samples) * 1e6, 3),
+        "loops": loops,
+        "repeats": repeats,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(selected: list[str], min_time: float, repeats: int, note: str = "") -> dict:
+    results, skipped = {}, {}
+    for name in selected:
+        try:
+            op = BENCHMARKS[name]()
+        except Exception as exc:  # missing optional deps, Redis down, ...
+            skipped[name] = f"{type(exc).__name__}: {exc}"
+            continue
+        results[name] = _measure(op, min_time, repeats)
+        print(f"{name:<36}{results[name]['median_us']:>14.1f} us", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "min_time": min_time,
+            "repeats": repeats,
+            "note": note,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list[dict]:
+    regressions = []
+    for name, result in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = result["median_us"] / base["median_us"]
+        result["baseline_us"] = base["median_us"]
+        result["ratio"] = round(ratio, 3)
+        if ratio > 1 + threshold:
+            regressions.append({"name": name, **result})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing sample")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", default=None)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--note", default="", help="free-form description of the machine, stored in meta")
+    args = parser.parse_args()
+
+    selected = [name for name in BENCHMARKS if args.filter in name]
+    report = run(selected, args.min_time, args.repeats, args.note)
+
+    regressions = []
+    if args.compare and args.baseline.exists():
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        report["regressions"] = regressions
+
+    output = json.dumps(report, indent=2)
+    if args.json_path:
+        Path(args.json_path).write_text(output)
+    else:
+        print(output)
+    if args.update_baseline:
+        baseline = {"meta": report["meta"], "results": report["results"], "skipped": report["skipped"]}
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+    for item in regressions:
+        print(f"REGRESSION {item['name']}: {item['median_us']}us vs {item['baseline_us']}us (x{item['ratio']})", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
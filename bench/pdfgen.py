@@ -0,0 +1,63 @@
+"""Synthetic resume PDFs for load tests and benchmarks (no PDF library needed)."""
+import random
+
+_SKILLS = [
+    "Python", "Django", "FastAPI", "Celery", "Redis", "PostgreSQL", "Docker", "Kubernetes",
+    "AWS", "Terraform", "React", "TypeScript", "Go", "Kafka", "Spark", "Airflow",
+]
+_VERBS = ["Built", "Led", "Designed", "Migrated", "Scaled", "Automated", "Shipped", "Optimised"]
+_THINGS = [
+    "a billing service", "the data platform", "CI pipelines", "a search API", "ETL jobs",
+    "an internal admin UI", "observability tooling", "the recommendation engine",
+]
+
+
+def resume_lines(n_lines: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    lines = ["Jane Doe - Senior Software Engineer", "Skills: " + ", ".join(rng.sample(_SKILLS, 6))]
+    while len(lines) < n_lines:
+        lines.append(
+            f"{rng.choice(_VERBS)} {rng.choice(_THINGS)} with {rng.choice(_SKILLS)} and "
+            f"{rng.choice(_SKILLS)}, cutting latency {rng.randint(10, 80)}%."
+        )
+    return lines[:n_lines]
+
+
+def resume_text(n_lines: int = 60, seed: int = 0) -> str:
+    return "\n".join(resume_lines(n_lines, seed))
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int = 1, lines_per_page: int = 45, seed: int = 0) -> bytes:
+    """A valid multi-page PDF with one Helvetica text stream per page."""
+    lines = resume_lines(pages * lines_per_page, seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        chunk = lines[page * lines_per_page:(page + 1) * lines_per_page]
+        text = "\n".join(f"({_escape(line)}) Tj T*" for line in chunk)
+        stream = f"BT /F1 10 Tf 12 TL 50 800 Td\n{text}\nET".encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), pages,
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
@@ -0,0 +1,214 @@
+"""Local stand-in for the LLM providers, for load tests without a paid API.
+
+Usable in-process (``SimulatedLLM().chat.completions.create``) or as an
+OpenAI/Groq-compatible HTTP server that the real Groq client talks to:
+
+    python -m bench.simulated_llm --port 8089 --latency lognormal:0.8,0.4 --rate-429 0.05
+    GROQ_API_KEY=sim GROQ_BASE_URL=http://127.0.0.1:8089 <start API and workers>
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+CANNED = {
+    "technical": {
+        "technicalSummary": "Backend engineer with production Python and cloud experience.",
+        "skillMatch": "Python, Django, AWS",
+        "experienceLevel": "Senior",
+        "overallScore": 78,
+    },
+    "semantic": {
+        "semanticSummary": "Résumé focused on delivery of scalable backend systems.",
+        "keyThemes": ["backend", "scalability", "ownership"],
+        "overallSentiment": "Positive",
+    },
+    "psychometric": {
+        "psychologicalTraits": ["conscientious", "pragmatic", "collaborative"],
+        "risks": ["frequent role changes"],
+        "trends": ["growing scope of ownership"],
+    },
+    "summary": {
+        "summary": "Strong senior backend profile; good fit on the core stack.",
+        "score": 76,
+    },
+}
+CANNED["fused"] = {
+    "technical": CANNED["technical"],
+    "semantic": CANNED["semantic"],
+    "psychometric": CANNED["psychometric"],
+    **CANNED["summary"],
+}
+
+
+def detect_stage(messages: list[dict]) -> str:
+    system = " ".join(m.get("content", "") for m in messages or [] if m.get("role") == "system").lower()
+    if "technical, semantic and psychometric" in system:
+        return "fused"
+    if "resume analyst" in system:
+        return "summary"
+    for stage in ("technical", "psychometric", "semantic"):
+        if stage in system:
+            return stage
+    return "summary"
+
+
+class LatencyModel:
+    """``fixed:S``, ``uniform:LO,HI`` or ``lognormal:MEDIAN,SIGMA`` (seconds)."""
+
+    def __init__(self, spec: str = "lognormal:0.8,0.4"):
+        kind, _, args = spec.partition(":")
+        self.kind = kind
+        self.args = [float(a) for a in args.split(",") if a]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.args[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.args)
+        median, sigma = self.args
+        return rng.lognormvariate(0, sigma) * median
+
+
+class SimulatedRateLimit(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Simulated 429; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SimulatedLLM:
+    def __init__(self, latency: str = "lognormal:0.8,0.4", rate_429: float = 0.0, retry_after: float = 1.0,
+                 malformed: float = 0.0, seed: int | None = None):
+        self.latency = LatencyModel(latency)
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.malformed = malformed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "throttled": 0, "malformed": 0}
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _draw(self) -> tuple[float, float, float]:
+        with self._lock:
+            return self.latency.sample(self._rng), self._rng.random(), self._rng.random()
+
+    def respond(self, messages: list[dict]) -> tuple[int, dict, float]:
+        """(status, body, latency_seconds) in OpenAI chat-completions format."""
+        latency, throttle_roll, malformed_roll = self._draw()
+        with self._lock:
+            self.stats["requests"] += 1
+            if throttle_roll < self.rate_429:
+                self.stats["throttled"] += 1
+                error = {"error": {"message": "Rate limit reached (simulated)", "type": "rate_limit_exceeded"}}
+                return 429, error, 0.0
+        stage = detect_stage(messages)
+        content = json.dumps(CANNED[stage])
+        if malformed_roll < self.malformed:
+            with self._lock:
+                self.stats["malformed"] += 1
+            content = content[: len(content) // 2]
+        prompt_tokens = sum(len(m.get("content", "")) for m in messages or []) // 4
+        completion_tokens = len(content) // 4
+        body = {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "simulated",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+        return 200, body, latency
+
+    def _create(self, *, model: str, temperature: float | None = None, messages: list[dict]):
+        status, body, latency = self.respond(messages)
+        if status == 429:
+            raise SimulatedRateLimit(self.retry_after)
+        time.sleep(latency)
+        usage = SimpleNamespace(**body["usage"])
+        message = SimpleNamespace(content=body["choices"][0]["message"]["content"])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage, model=model)
+
+
+def make_handler(llm: SimulatedLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if not self.path.endswith("/chat/completions"):
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            status, body, latency = llm.respond(payload.get("messages", []))
+            time.sleep(latency)
+            if status == 200:
+                body["model"] = payload.get("model", body["model"])
+            headers = {"retry-after": str(llm.retry_after)} if status == 429 else {}
+            self._send(status, body, headers)
+
+        def _send(self, status: int, body: dict, headers: dict | None = None):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(llm: SimulatedLLM, host: str = "127.0.0.1", port: int = 8089) -> ThreadingHTTPServer:
+    """Start the HTTP stand-in on a daemon thread and return the server."""
+    server = ThreadingHTTPServer((host, port), make_handler(llm))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="simulated-llm", daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency", default="lognormal:0.8,0.4", help="fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--malformed", type=float, default=0.0, help="fraction of truncated JSON bodies")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def from_args(args) -> SimulatedLLM:
+    return SimulatedLLM(args.latency, args.rate_429, args.retry_after, args.malformed, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args()
+    llm = from_args(args)
+    server = serve(llm, args.host, args.port)
+    print(f"Simulated LLM on http://{args.host}:{args.port} (GROQ_BASE_URL)")
+    try:
+        while True:
+            time.sleep(10)
+            print(json.dumps(llm.stats))
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
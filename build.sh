@@ -72,7 +72,7 @@ echo "ENVIRONMENT=$ENVIRONMENT"
 echo "REDIS_URL=$REDIS_URL"
 
 echo "Starting Celery worker..."
-python -m celery -A backend.celery_app worker -l info -Q extraction --concurrency 1 &
+PDF_POOL_SMALL_DOCS=1 python -m celery -A backend.celery_app worker -l info -Q extraction --pool threads --concurrency "$CELERY_CONCURRENCY" &
 python -m celery -A backend.celery_app worker -l info -Q analysis --concurrency "$CELERY_CONCURRENCY" &
 CELERY_PID=$!
 
@@ -0,0 +1,40 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ui", "0002_analysisrun_file_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="analysisrun",
+            name="prompt_tokens",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="analysisrun",
+            name="completion_tokens",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="analysisrun",
+            name="total_tokens",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="analysisrun",
+            name="llm_latency_ms",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="analysisrun",
+            name="cost_usd",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="analysisrun",
+            name="usage_json",
+            field=models.TextField(blank=True),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import json
+
 from django.db import models
 
 
@@ -11,6 +13,32 @@ class AnalysisRun(models.Model):
     has_pdf = models.BooleanField(default=False)
     document_length = models.IntegerField(default=0)
     result_json = models.TextField(blank=True)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    total_tokens = models.IntegerField(default=0)
+    llm_latency_ms = models.FloatField(null=True, blank=True)
+    cost_usd = models.FloatField(null=True, blank=True)
+    usage_json = models.TextField(blank=True)
 
     class Meta:
         ordering = ["-created_at"]
+
+    @staticmethod
+    def usage_fields(result: dict | None) -> dict:
+        """Column values from the ``usage`` block of an analysis result.
+
+        ``llm_latency_ms`` leaves out rate-limiter wait; the per-stage and
+        per-model split, wait included, is kept in ``usage_json``.
+        """
+        usage = (result or {}).get("usage") or {}
+        latency_ms = usage.get("latency_ms")
+        if latency_ms is not None:
+            latency_ms = max(0.0, latency_ms - (usage.get("limiter_wait_ms") or 0.0))
+        return {
+            "prompt_tokens": usage.get("prompt_tokens") or 0,
+            "completion_tokens": usage.get("completion_tokens") or 0,
+            "total_tokens": usage.get("total_tokens") or 0,
+            "llm_latency_ms": latency_ms,
+            "cost_usd": usage.get("cost_usd"),
+            "usage_json": json.dumps(usage.get("stages") or {}),
+        }
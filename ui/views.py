@@ -1,6 +1,7 @@
 import json
-import os
-import tempfile
+import logging
+
+import redis
 
 from django.shortcuts import render, redirect
 from django.utils import timezone
@@ -9,31 +10,30 @@ from .forms import AnalysisForm
 from .ai_model_choices import AI_MODEL_PROVIDERS
 from .models import AnalysisRun
 from .services import run_full_analysis, backend_url
-from .pdf_utils import pdf_reader
+from analysis.store import load_document, pdf_digest, store_document
+from analysis.usage import models_used
+from utils.document import document_variant, parse_document
 
-try:
-    from utils.pyresparser.resume_parser import ResumeParser
-except Exception:
-    ResumeParser = None
+logger = logging.getLogger("backend.ui.views")
 
 
 def _extract_from_pdf(uploaded_file):
-    tmp_path = None
+    """One parse feeds the text and the structured fields, shared via Redis with the workers."""
+    pdf_bytes = b"".join(uploaded_file.chunks())
+    digest = pdf_digest(pdf_bytes)
+    document = None
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-            for chunk in uploaded_file.chunks():
-                tmp.write(chunk)
-            tmp_path = tmp.name
-
-        resume_text = pdf_reader(tmp_path)
-        resume_data = None
-        if ResumeParser is not None:
-            resume_data = ResumeParser(tmp_path).get_extracted_data()
+        document = load_document(digest, document_variant())
+    except redis.RedisError:
+        logger.warning("document_cache_unavailable", exc_info=True)
+    if document is None:
+        document = parse_document(pdf_bytes)
+        try:
+            store_document(digest, document)
+        except redis.RedisError:
+            logger.warning("document_cache_store_failed", exc_info=True)
 
-        return resume_text, resume_data
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.remove(tmp_path)
+    return document["text"], document["fields"]
 
 
 def index(request):
@@ -82,6 +82,7 @@ def index(request):
                         has_pdf=bool(pdf_file),
                         document_length=len(document_text),
                         result_json=json.dumps(result),
+                        **AnalysisRun.usage_fields(result),
                     )
             except Exception as exc:
                 error = str(exc)
@@ -141,9 +142,52 @@ def analytics(request):
                 "document_length": run.document_length,
                 "summary": summary,
                 "score": score,
+                "total_tokens": run.total_tokens,
+                "cost_usd": run.cost_usd,
             }
         )
-    return render(request, "ui/analytics.html", {"runs": runs_data})
+    return render(request, "ui/analytics.html", {"runs": runs_data, "token_usage": _token_usage()})
+
+
+def _token_usage() -> list[dict]:
+    """Per served model (not the requested one) over every run's per-stage usage.
+
+    Runs whose model has no price are counted in ``unpriced_runs`` and left
+    out of ``total_cost_usd`` rather than summed as free. Latency is per
+    call and excludes rate-limiter wait, which is reported on its own.
+    """
+    by_model = {}
+    # Runs logged before token accounting have total_tokens=0.
+    for usage_json in AnalysisRun.objects.filter(total_tokens__gt=0).values_list("usage_json", flat=True).iterator():
+        try:
+            stages = json.loads(usage_json or "{}")
+        except ValueError:
+            continue
+        for model, used in models_used(stages).items():
+            row = by_model.setdefault(model, {
+                "model": model, "runs": 0, "calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "latency_ms": 0.0, "limiter_wait_ms": 0.0, "total_cost_usd": None, "unpriced_runs": 0,
+            })
+            row["runs"] += 1
+            for key in ("calls", "prompt_tokens", "completion_tokens", "latency_ms", "limiter_wait_ms"):
+                row[key] += used[key]
+            if used["cost_usd"] is None:
+                row["unpriced_runs"] += 1
+            else:
+                row["total_cost_usd"] = (row["total_cost_usd"] or 0.0) + used["cost_usd"]
+
+    token_usage = []
+    for row in sorted(by_model.values(), key=lambda row: -row["runs"]):
+        calls = row["calls"] or 1
+        token_usage.append({
+            **row,
+            "avg_prompt_tokens": row["prompt_tokens"] / row["runs"],
+            "avg_completion_tokens": row["completion_tokens"] / row["runs"],
+            "avg_total_tokens": (row["prompt_tokens"] + row["completion_tokens"]) / row["runs"],
+            "avg_latency_ms": max(0.0, row["latency_ms"] - row["limiter_wait_ms"]) / calls,
+            "avg_limiter_wait_ms": row["limiter_wait_ms"] / calls,
+        })
+    return token_usage
 
 
 def technical_docs(request):
@@ -0,0 +1,89 @@
+import re
+from typing import TypedDict
+
+from utils.pdf_extract import PDF_MAX_CHARS, PDF_MAX_PAGES, PdfSource, extract_pages
+
+# Bump when the parse output changes shape so cached documents are ignored.
+DOCUMENT_VERSION = 1
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"(?<!\w)\+?\d[\d ().-]{7,}\d(?!\w)")
+_LINK_RE = re.compile(r"(?:https?://|www\.)\S+|\b(?:linkedin\.com|github\.com)/\S+", re.IGNORECASE)
+_NAME_RE = re.compile(r"^[A-Za-z][A-Za-z.'-]*(?: [A-Za-z][A-Za-z.'-]*){1,3}$")
+
+
+class PageSpan(TypedDict):
+    page: int   # 1-based page number
+    start: int  # character offsets into ParsedDocument.text
+    end: int
+    ms: float
+
+
+class ParsedDocument(TypedDict):
+    version: int
+    variant: str
+    text: str
+    pages: list[PageSpan]
+    # [page, x0, y0, x1, y1, start, end]: text-box bbox in PDF points and its
+    # character span in ``text``; lists rather than dicts keep the payload small.
+    boxes: list[list]
+    fields: dict
+    stats: dict
+
+
+def document_variant(max_pages: int | None = None, max_chars: int | None = None) -> str:
+    """Cache discriminator: the same PDF parsed under other budgets is another document."""
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+    return f"v{DOCUMENT_VERSION}:{max_pages}:{max_chars}"
+
+
+def _first_match(pattern: re.Pattern, text: str) -> str | None:
+    match = pattern.search(text)
+    return match.group(0).strip() if match else None
+
+
+def _guess_name(first_page: str) -> str | None:
+    # Resumes nearly always open with the candidate's name on its own line.
+    for line in first_page.splitlines()[:8]:
+        line = line.strip()
+        if line and _NAME_RE.match(line):
+            return line
+    return None
+
+
+def extract_fields(text: str, pages: list[PageSpan], total_pages: int) -> dict:
+    """Cheap structured fields; keys follow pyresparser's output where they overlap."""
+    first_page = text[pages[0]["start"]:pages[0]["end"]] if pages else text
+    return {
+        "name": _guess_name(first_page),
+        "email": _first_match(_EMAIL_RE, text),
+        "mobile_number": _first_match(_PHONE_RE, text),
+        "links": list(dict.fromkeys(m.rstrip(".,;)") for m in _LINK_RE.findall(text)))[:10],
+        "no_of_pages": total_pages,
+    }
+
+
+def parse_document(
+    source: PdfSource,
+    max_pages: int | None = None,
+    max_chars: int | None = None,
+) -> ParsedDocument:
+    """Parse a PDF once into text, page spans, layout boxes and structured fields."""
+    pages, stats = extract_pages(source, max_pages=max_pages, max_chars=max_chars)
+    parts, spans, boxes, offset = [], [], [], 0
+    for number, page_text, elapsed, page_boxes in pages:
+        parts.append(page_text)
+        spans.append({"page": number + 1, "start": offset, "end": offset + len(page_text), "ms": elapsed})
+        boxes += [[number + 1, *box[:4], offset + box[4], offset + box[5]] for box in page_boxes]
+        offset += len(page_text)
+    text = "".join(parts)
+    return {
+        "version": DOCUMENT_VERSION,
+        "variant": document_variant(max_pages, max_chars),
+        "text": text,
+        "pages": spans,
+        "boxes": boxes,
+        "fields": extract_fields(text, spans, stats["total_pages"]),
+        "stats": stats,
+    }
@@ -0,0 +1,255 @@
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Iterator
+
+from pdfminer3.converter import PDFPageAggregator
+from pdfminer3.layout import LAParams, LTContainer, LTText, LTTextBox
+from pdfminer3.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer3.pdfpage import PDFPage
+
+logger = logging.getLogger("backend.utils.pdf_extract")
+
+# Shared by the Django UI and the extraction workers. Everything stays in
+# memory: uploads are already bytes by the time they reach us.
+PdfSource = bytes | bytearray | memoryview | BinaryIO
+
+# Documents with at least this many pages are split across a process pool.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+PDF_PARALLEL_WORKERS = int(os.getenv("PDF_PARALLEL_WORKERS", "0")) or os.cpu_count() or 1
+# Send smaller documents to the same pool whole, one task each. A threaded
+# extraction worker (--pool threads) then extracts several documents at once
+# without contending for the GIL; prefork children cannot start the pool.
+PDF_POOL_SMALL_DOCS = os.getenv("PDF_POOL_SMALL_DOCS", "0") == "1"
+# Extraction stops after this many pages / characters (0 disables). Prompts
+# only ever see RESUME_TOKEN_BUDGET tokens, so the tail of a long PDF is waste.
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "20"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "40000"))
+
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+# A broken pool (e.g. a worker OOM-killed on a hostile PDF) is rebuilt on the
+# next call; only repeated breakage or a failure to start disables it.
+_POOL_MAX_FAILURES = 3
+_pool_failures = 0
+_pool_unavailable = False
+
+
+def as_stream(source: PdfSource) -> BinaryIO:
+    """Seekable binary stream over ``source`` (BytesIO shares the bytes buffer)."""
+    if isinstance(source, memoryview):
+        source = source.tobytes()
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    return source
+
+
+def _as_bytes(source: PdfSource) -> bytes:
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    source.seek(0)
+    return source.read()
+
+
+def count_pages(source: PdfSource) -> int:
+    # Walks the page tree only; no content streams are interpreted.
+    return sum(1 for _ in PDFPage.get_pages(as_stream(source), check_extractable=True))
+
+
+# (page_number, text, elapsed_ms, boxes); each box is (x0, y0, x1, y1, start, end)
+# with start/end character offsets into the page text.
+Page = tuple[int, str, float, list[tuple]]
+
+
+def _render_layout(layout) -> tuple[str, list[tuple]]:
+    """Page text in the same order TextConverter writes it, plus text-box geometry."""
+    parts, boxes, length = [], [], 0
+
+    def write(text: str):
+        nonlocal length
+        parts.append(text)
+        length += len(text)
+
+    def render(item):
+        if isinstance(item, LTTextBox):
+            start = length
+            write(item.get_text())
+            boxes.append((*(round(v, 1) for v in item.bbox), start, length))
+            write("\n")
+        elif isinstance(item, LTContainer):
+            for child in item:
+                render(child)
+        elif isinstance(item, LTText):
+            write(item.get_text())
+
+    render(layout)
+    write("\f")
+    return "".join(parts), boxes
+
+
+def iter_pages(source: PdfSource, page_numbers: list[int] | None = None) -> Iterator[Page]:
+    """Yield one ``Page`` for each requested 0-based page, in order.
+
+    Pages are parsed lazily with pdfminer's object cache off, so stopping
+    early skips the remaining pages and memory stays bounded by one page.
+    """
+    resource_manager = PDFResourceManager()
+    aggregator = PDFPageAggregator(resource_manager, laparams=LAParams())
+    page_interpreter = PDFPageInterpreter(resource_manager, aggregator)
+    wanted = set(page_numbers) if page_numbers else None
+    pdf_pages = PDFPage.get_pages(as_stream(source), pagenos=wanted, caching=False, check_extractable=True)
+    for index, page in enumerate(pdf_pages):
+        started = time.perf_counter()
+        page_interpreter.process_page(page)
+        text, boxes = _render_layout(aggregator.get_result())
+        yield (
+            page_numbers[index] if page_numbers else index,
+            text,
+            round((time.perf_counter() - started) * 1000, 2),
+            boxes,
+        )
+        if wanted and index + 1 == len(wanted):
+            return
+
+
+def _within_budget(pages, max_chars: int) -> Iterator[Page]:
+    # The page that crosses the budget is kept; extract_pages trims the excess.
+    chars = 0
+    for page in pages:
+        yield page
+        chars += len(page[1])
+        if max_chars and chars >= max_chars:
+            return
+
+
+def _extract_pages(source: PdfSource, page_numbers: list[int] | None = None, max_chars: int = 0) -> list[Page]:
+    return list(_within_budget(iter_pages(source, page_numbers), max_chars))
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool, _pool_pid, _pool_unavailable
+    if _pool_unavailable or multiprocessing.current_process().daemon:
+        return None
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            try:
+                # spawn: the parent may hold Redis/HTTP threads that fork would copy mid-flight.
+                _pool = ProcessPoolExecutor(
+                    max_workers=PDF_PARALLEL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, ValueError):
+                logger.warning("pdf_parallel_pool_unavailable", exc_info=True)
+                _pool, _pool_unavailable = None, True
+                return None
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor, disable: bool):
+    global _pool, _pool_failures, _pool_unavailable
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+        _pool_failures += 1
+        _pool_unavailable = disable or _pool_failures >= _POOL_MAX_FAILURES
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_parallel(pool: ProcessPoolExecutor, pdf_bytes: bytes, n_pages: int, workers: int, max_chars: int):
+    global _pool_failures
+    # A single range stops at the character budget in the pool process;
+    # split ranges are trimmed after reassembly.
+    budget = max_chars if workers == 1 else 0
+    try:
+        futures = [pool.submit(_extract_pages, pdf_bytes, chunk, budget) for chunk in _page_ranges(n_pages, workers)]
+        pages = [page for future in futures for page in future.result()]
+    except BrokenProcessPool:
+        logger.warning("pdf_parallel_pool_broken", extra={"failures": _pool_failures + 1}, exc_info=True)
+        _discard_pool(pool, disable=False)
+        return None, 1
+    except (AssertionError, OSError):
+        # Celery prefork children are daemonic and may not start processes;
+        # run those workers with --pool threads to use the pool.
+        logger.warning("pdf_parallel_pool_unavailable", exc_info=True)
+        _discard_pool(pool, disable=True)
+        return None, 1
+    _pool_failures = 0
+    return pages, workers
+
+
+def _page_ranges(n_pages: int, n_chunks: int) -> list[list[int]]:
+    size, extra = divmod(n_pages, n_chunks)
+    ranges, start = [], 0
+    for chunk in range(n_chunks):
+        end = start + size + (1 if chunk < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def extract_pages(
+    source: PdfSource,
+    parallel: bool | None = None,
+    max_pages: int | None = None,
+    max_chars: int | None = None,
+) -> tuple[list[Page], dict]:
+    """Extract pages and per-page timings, stopping at the page/character budget.
+
+    Budgets default to ``PDF_MAX_PAGES``/``PDF_MAX_CHARS``; pass 0 for no limit.
+    Documents of ``PDF_PARALLEL_MIN_PAGES`` or more (after the page budget)
+    are split into contiguous page ranges across a process pool and
+    reassembled in page order; smaller ones run in the pool whole when
+    ``PDF_POOL_SMALL_DOCS`` is set, and serially in this process otherwise.
+    """
+    started = time.perf_counter()
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    max_chars = PDF_MAX_CHARS if max_chars is None else max_chars
+    pdf_bytes = _as_bytes(source)
+    total_pages = count_pages(pdf_bytes)
+    n_pages = min(total_pages, max_pages) if max_pages else total_pages
+    use_parallel = (n_pages >= PDF_PARALLEL_MIN_PAGES) if parallel is None else parallel
+    workers = min(PDF_PARALLEL_WORKERS, n_pages) if use_parallel else 1
+    pooled = n_pages > 0 and (workers > 1 or (PDF_POOL_SMALL_DOCS and parallel is None))
+    pool = _get_pool() if pooled else None
+
+    pages, workers = _extract_parallel(pool, pdf_bytes, n_pages, workers, max_chars) if pool is not None else (None, 1)
+    mode = "serial" if pages is None else "parallel" if workers > 1 else "pooled"
+    if pages is None:
+        pages = iter_pages(pdf_bytes, list(range(n_pages)) if n_pages < total_pages else None)
+    pages = list(_within_budget(pages, max_chars))
+
+    chars = sum(len(page[1]) for page in pages)
+    truncated = len(pages) < total_pages or bool(max_chars and chars > max_chars)
+    if max_chars and chars > max_chars:
+        number, page_text, elapsed, boxes = pages[-1]
+        keep = len(page_text) - (chars - max_chars)
+        pages[-1] = (number, page_text[:keep], elapsed, [(*box[:5], min(box[5], keep)) for box in boxes if box[4] < keep])
+    stats = {
+        "pages": len(pages),
+        "total_pages": total_pages,
+        "truncated": truncated,
+        "mode": mode,
+        "workers": workers,
+        "page_ms": [page[2] for page in pages],
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    return pages, stats
+
+
+def extract_text(source: PdfSource, **options) -> tuple[str, dict]:
+    """``extract_pages`` joined into plain text (pages end with a form feed)."""
+    pages, stats = extract_pages(source, **options)
+    return "".join(page[1] for page in pages), stats
+
+
+def pdf_bytes_to_text(source: PdfSource) -> str:
+    return extract_text(source)[0]